@@ -0,0 +1,38 @@
+# atomic_file.py
+import os
+import threading
+
+_path_locks = {} # absolute path -> lock serializing the writers of that file
+_path_locks_lock = threading.Lock()
+
+def _path_lock(path):
+    with _path_locks_lock:
+        return _path_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+def write_snapshot(path, take_snapshot):
+    """
+    Writes a store's file from any thread. Writers of the same path take turns, and take_snapshot()
+    is called inside that turn so the newest state is always written last; it returns the text to
+    write, or None when there is nothing to save. The text goes to a temp file that then replaces
+    path, so a concurrent reader or a crash never sees a half-written file. Returns True if the
+    file was written; errors are raised to the caller.
+    """
+    with _path_lock(path):
+        snapshot = take_snapshot()
+        if snapshot is None:
+            return False
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(snapshot)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        return True
@@ -0,0 +1,115 @@
+# candidate_pool.py
+import json
+import os
+import threading
+from datetime import datetime, timedelta, UTC
+from config import CANDIDATE_POOL_FILE, CANDIDATE_POOL_TTL_HOURS, CANDIDATE_POOL_MAX_ARTICLE_AGE_HOURS
+from atomic_file import write_snapshot
+from seen_index import SeenArticleIndex
+
+class CandidatePool:
+    """
+    Persists every fresh article seen in fetched feeds, tagged with the categories whose source
+    lists contain that feed, so later runs can be served without touching the network.
+    Candidates expire CANDIDATE_POOL_TTL_HOURS after they were pooled, or once the article
+    itself is older than CANDIDATE_POOL_MAX_ARTICLE_AGE_HOURS.
+    """
+
+    def __init__(self, pool_file=CANDIDATE_POOL_FILE):
+        self.pool_file = pool_file
+        self.candidates = {} # normalized article URL -> candidate
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Loads pooled candidates from the JSON pool file and drops expired ones."""
+        if not os.path.exists(self.pool_file):
+            print(f"Candidate pool {self.pool_file} not found. Starting with an empty pool.")
+            return
+        try:
+            with open(self.pool_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.candidates = data
+            self.prune()
+            print(f"Candidate pool loaded: {len(self.candidates)} articles.")
+        except json.JSONDecodeError:
+            print(f"Candidate pool {self.pool_file} is corrupted. Starting with an empty pool.")
+        except Exception as e:
+            print(f"Error loading candidate pool {self.pool_file}: {e}. Starting with an empty pool.")
+
+    def _snapshot(self):
+        with self._lock:
+            if not self._dirty:
+                return None
+            self._dirty = False
+            return json.dumps(self.candidates)
+
+    def save(self):
+        """Writes the pool back to disk if anything changed."""
+        try:
+            write_snapshot(self.pool_file, self._snapshot)
+        except Exception as e:
+            print(f"Error saving candidate pool {self.pool_file}: {e}")
+
+    def prune(self):
+        """Drops candidates that outlived their TTL or whose article is too old to post."""
+        now = datetime.now(UTC)
+        pooled_cutoff = (now - timedelta(hours=CANDIDATE_POOL_TTL_HOURS)).isoformat()
+        published_cutoff = (now - timedelta(hours=CANDIDATE_POOL_MAX_ARTICLE_AGE_HOURS)).isoformat()
+        with self._lock:
+            expired = [key for key, candidate in self.candidates.items()
+                       if candidate.get('pooled_at', '') < pooled_cutoff
+                       or candidate.get('publishedAt', '') < published_cutoff]
+            for key in expired:
+                del self.candidates[key]
+            if expired:
+                self._dirty = True
+
+    def add(self, article, categories):
+        """Pools an article for the given categories, merging tags if it is already pooled."""
+        key = SeenArticleIndex.normalize_url(article.get('url'))
+        if not key:
+            return
+        with self._lock:
+            candidate = self.candidates.get(key)
+            if candidate is None:
+                candidate = dict(article, categories=[], pooled_at=datetime.now(UTC).isoformat())
+                self.candidates[key] = candidate
+            for category in categories:
+                if category not in candidate['categories']:
+                    candidate['categories'].append(category)
+            self._dirty = True
+
+    def count(self, category):
+        """Returns how many candidates are pooled for category."""
+        with self._lock:
+            return sum(1 for candidate in self.candidates.values() if category in candidate['categories'])
+
+    def take(self, category, seen_index=None):
+        """
+        Removes and returns the newest pooled candidate for category, skipping (and dropping)
+        any that seen_index reports as already posted. Returns None if none is left.
+        """
+        with self._lock:
+            ranked = sorted(((key, candidate) for key, candidate in self.candidates.items()
+                             if category in candidate['categories']),
+                            key=lambda item: item[1].get('publishedAt', ''), reverse=True)
+            for key, candidate in ranked:
+                del self.candidates[key]
+                self._dirty = True
+                if seen_index is not None and seen_index.is_seen(candidate.get('url'), candidate.get('title')):
+                    continue
+                article = dict(candidate)
+                article.pop('categories', None)
+                article.pop('pooled_at', None)
+                return article
+        return None
+
+    def discard(self, url):
+        """Removes an article from the pool, e.g. once it has been picked for a post."""
+        key = SeenArticleIndex.normalize_url(url)
+        with self._lock:
+            if self.candidates.pop(key, None) is not None:
+                self._dirty = True
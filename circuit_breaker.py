@@ -0,0 +1,111 @@
+# circuit_breaker.py
+import json
+import os
+import threading
+from datetime import datetime, timedelta, UTC
+from config import (
+    CIRCUIT_BREAKER_ENABLED, CIRCUIT_BREAKER_FILE, CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_COOLDOWN_SECONDS, CIRCUIT_BREAKER_MAX_COOLDOWN_SECONDS
+)
+from atomic_file import write_snapshot
+
+class CircuitBreakerRegistry:
+    """
+    Per-provider circuit breakers, persisted across runs. A circuit opens after
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive failures (timeouts, rate limits, rejected keys,
+    server errors) and the provider is skipped without a request. Once the cool-down has passed
+    the circuit is half-open: a single probe is let through, which closes the circuit on success
+    or reopens it with a doubled cool-down (up to CIRCUIT_BREAKER_MAX_COOLDOWN_SECONDS).
+
+    Names are '<kind>:<provider>', e.g. 'stock:Pexels', 'hf:<model>' or 'llm:<model>'.
+    """
+
+    def __init__(self, state_file=CIRCUIT_BREAKER_FILE):
+        self.state_file = state_file
+        self.circuits = {} # name -> {'state', 'failures', 'opened_at', 'cooldown_seconds'}
+        self._probing = set() # half-open circuits whose probe is in flight in this process
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Loads circuit states from the JSON state file."""
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.circuits = data
+            open_circuits = [name for name, circuit in self.circuits.items() if circuit['state'] != 'closed']
+            if open_circuits:
+                print(f"Open circuits: {', '.join(open_circuits)}")
+        except Exception as e:
+            print(f"Error loading circuit breaker state {self.state_file}: {e}. All circuits start closed.")
+
+    def _snapshot(self):
+        with self._lock:
+            if not self._dirty:
+                return None
+            self._dirty = False
+            return json.dumps(self.circuits, indent=2)
+
+    def save(self):
+        """Writes the circuit states back to disk if anything changed."""
+        try:
+            write_snapshot(self.state_file, self._snapshot)
+        except Exception as e:
+            with self._lock:
+                self._dirty = True
+            print(f"Error saving circuit breaker state {self.state_file}: {e}")
+
+    def allow(self, name):
+        """
+        True if a request to name may be made now. For a half-open circuit this hands out its
+        single probe, so callers should only ask when they are about to send the request.
+        """
+        if not CIRCUIT_BREAKER_ENABLED:
+            return True
+        with self._lock:
+            circuit = self.circuits.get(name)
+            if circuit is None or circuit['state'] == 'closed':
+                return True
+            if name in self._probing:
+                return False
+            reopen_at = datetime.fromisoformat(circuit['opened_at']) + timedelta(seconds=circuit['cooldown_seconds'])
+            if datetime.now(UTC) < reopen_at:
+                return False
+            circuit['state'] = 'half_open'
+            self._probing.add(name)
+            self._dirty = True
+        print(f"Circuit for {name} is half-open; sending a probe request.")
+        return True
+
+    def record_success(self, name):
+        with self._lock:
+            circuit = self.circuits.get(name)
+            self._probing.discard(name)
+            if circuit is None or (circuit['state'] == 'closed' and circuit['failures'] == 0):
+                return
+            if circuit['state'] != 'closed':
+                print(f"Circuit for {name} closed again.")
+            self.circuits[name] = {'state': 'closed', 'failures': 0, 'opened_at': None, 'cooldown_seconds': CIRCUIT_BREAKER_COOLDOWN_SECONDS}
+            self._dirty = True
+
+    def record_failure(self, name):
+        with self._lock:
+            circuit = self.circuits.setdefault(name, {'state': 'closed', 'failures': 0, 'opened_at': None, 'cooldown_seconds': CIRCUIT_BREAKER_COOLDOWN_SECONDS})
+            circuit['failures'] += 1
+            self._dirty = True
+            was_probing = name in self._probing
+            self._probing.discard(name)
+            if circuit['state'] == 'closed' and circuit['failures'] < CIRCUIT_BREAKER_FAILURE_THRESHOLD:
+                return
+            if circuit['state'] == 'half_open' and was_probing:
+                circuit['cooldown_seconds'] = min(CIRCUIT_BREAKER_MAX_COOLDOWN_SECONDS, circuit['cooldown_seconds'] * 2)
+            elif circuit['state'] != 'closed':
+                return # A request that was already in flight when the circuit opened
+            circuit['state'] = 'open'
+            circuit['opened_at'] = datetime.now(UTC).isoformat()
+            cooldown = circuit['cooldown_seconds']
+        print(f"Circuit for {name} opened after {circuit['failures']} consecutive failures; skipping it for {cooldown / 60:.0f} min.")
@@ -16,6 +16,12 @@ INFERENCE_API_ENDPOINTS = [
     "https://api-inference.huggingface.co/models/runwayml/stable-diffusion-v1-5",
     "https://api-inference.huggingface.co/models/CompVis/stable-diffusion-v1-4"
 ]
+HF_GENERATION_MODE = "concurrent" # "concurrent" (top endpoints at once, first image wins) or "sequential"
+HF_CONCURRENT_ENDPOINTS = 2 # Endpoints generating at the same time in concurrent mode
+HF_REQUEST_TIMEOUT_SECONDS = 90 # Per-request timeout
+HF_GENERATION_DEADLINE_SECONDS = 150 # Overall wait for an image in concurrent mode
+HF_MAX_LOADING_WAIT_SECONDS = 40 # A loading model (503) is waited for only if its estimated_time is below this
+HF_LATENCY_HISTORY = 20 # Recent attempts kept per endpoint
 
 # --- API Keys (from environment variables) ---
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
@@ -57,6 +63,107 @@ ALL_POSTS_EXCEL_FILE = f"{EXCEL_OUTPUT_DIR}/all_posts.xlsx"
 STYLE_RECOMMENDATIONS_FILE = f"{JSON_OUTPUT_DIR}/style_recommendations.json"
 INSTAGRAM_ANALYSIS_FILE = f"{JSON_OUTPUT_DIR}/instagram_analysis.json"
 EXTERNAL_INSTAGRAM_ANALYSIS_FILE = f"{JSON_OUTPUT_DIR}/external_instagram_analysis.json"
+SEEN_ARTICLES_FILE = f"{JSON_OUTPUT_DIR}/seen_articles.json" # Hashes of already-posted article URLs and titles
+HF_LATENCY_FILE = f"{JSON_OUTPUT_DIR}/hf_latency.json" # Recent latencies and outcomes per Hugging Face endpoint
+
+
+# --- RSS Fetching ---
+RSS_FETCH_MODE = "concurrent" # "concurrent" (all sources of a category in parallel) or "sequential"
+RSS_CONCURRENT_STRATEGY = "first" # "first" (first source with a fresh article wins) or "all" (newest article within the deadline)
+RSS_FEED_TIMEOUT_SECONDS = 10 # Per-feed connect/read timeout
+RSS_FETCH_DEADLINE_SECONDS = 20 # Overall wait for a category in concurrent mode
+RSS_MAX_WORKERS = 8
+RSS_USER_AGENT = "Mozilla/5.0 (compatible; InsightPulseBot/1.0; +https://insightpulse.com)"
+FEED_CACHE_FILE = f"{JSON_OUTPUT_DIR}/feed_cache.json" # ETag/Last-Modified and parsed entries per feed URL
+FEED_CACHE_MAX_ENTRIES_PER_FEED = 50
+FEED_HEALTH_FILE = f"{JSON_OUTPUT_DIR}/feed_health.json" # Per-feed success rate, latency, bozo rate and last fresh article
+FEED_HEALTH_LATENCY_SAMPLES = 20 # Recent latencies kept per feed for the median
+FEED_HEALTH_EXPLORATION_RATE = 0.1 # Chance of trying a category's feeds in fully random order
+FEED_HEALTH_DEMOTE_AFTER_FAILURES = 3 # Consecutive failures before a feed is benched
+FEED_HEALTH_RETRY_DEMOTED_HOURS = 24 # How long a benched feed waits before it is tried normally again
+CANDIDATE_POOL_FILE = f"{JSON_OUTPUT_DIR}/candidate_pool.json" # Fresh articles from fetched feeds, tagged by category
+CANDIDATE_POOL_TTL_HOURS = 12 # How long a pooled article stays servable
+CANDIDATE_POOL_MAX_ARTICLE_AGE_HOURS = 72 # Pooled articles published earlier than this are dropped
+CANDIDATE_POOL_LOW_WATERMARK = 2 # Refill a category from the network when fewer articles than this are pooled
+
+
+# --- LLM Response Cache ---
+LLM_CACHE_ENABLED = True
+LLM_CACHE_FILE = f"{JSON_OUTPUT_DIR}/llm_cache.json" # Completion texts keyed by a hash of model, messages, temperature and max_tokens
+LLM_CACHE_TTL_HOURS = 24
+LLM_CACHE_MAX_BYTES = 2 * 1024 * 1024 # Least recently used responses are evicted beyond this
+
+# --- LLM Call Strategy ---
+LLM_POST_BUNDLE_MODE = False # True: one call returns title, summary, caption and hashtags; the two-call path stays as fallback
+LLM_STREAMING_ENABLED = False # True: stream completions, start image search on the headline and stop once the needed fields are in
+LLM_TEXT_MODEL_CHAIN = [ # Headline/summary, post bundle and quotes; tried in order
+    OPENROUTER_MODEL,
+    OPENROUTER_MISTRAL_MODEL,
+    "meta-llama/llama-3.3-70b-instruct:free",
+    "google/gemma-3-27b-it:free",
+]
+LLM_CAPTION_MODEL_CHAIN = [ # Captions and hashtags; tried in order
+    OPENROUTER_MISTRAL_MODEL,
+    OPENROUTER_MODEL,
+    "meta-llama/llama-3.3-70b-instruct:free",
+]
+LLM_MAX_ATTEMPTS = 4 # Attempts per call across the chain, hedged requests included
+LLM_REQUEST_TIMEOUT_SECONDS = 45 # Per-attempt timeout
+LLM_CALL_DEADLINE_SECONDS = 90 # Overall deadline for one call across all attempts
+LLM_BACKOFF_BASE_SECONDS = 1.0 # Full-jitter exponential backoff between failed attempts
+LLM_BACKOFF_MAX_SECONDS = 8.0
+LLM_HEDGE_ENABLED = True # Start the next model when the current one exceeds its p90 latency
+LLM_HEDGE_MIN_SAMPLES = 5 # Latency samples needed before a model's own p90 is used
+LLM_HEDGE_DEFAULT_DELAY_SECONDS = 20
+LLM_LATENCY_HISTORY = 50 # Recent successful latencies kept per model
+LLM_LATENCY_FILE = f"{JSON_OUTPUT_DIR}/llm_latency.json"
+
+
+# --- HTTP Session Pool ---
+HTTP_POOL_MAX_HOSTS = 48 # Per-host keep-alive pools kept open (RSS feeds, stock photo APIs and CDNs, HF, Graph API)
+HTTP_POOL_MAX_CONNECTIONS_PER_HOST = 8 # Concurrent connections kept per host
+HTTP_RETRY_TOTAL = 2 # Retries for connection errors, and for idempotent requests also read errors and the codes below
+HTTP_RETRY_BACKOFF_FACTOR = 0.5
+HTTP_RETRY_STATUS_CODES = (500, 502, 504)
+
+# --- Stock Photo Fetching ---
+IMAGE_FETCH_MODE = "race" # "race" (all configured providers at once) or "sequential" (Pexels, Unsplash, Openverse, Pixabay in turn)
+IMAGE_RACE_GRACE_SECONDS = 1.5 # After the first image arrives, how long a more preferred provider still gets to answer
+IMAGE_RACE_DEADLINE_SECONDS = 30 # Overall wait for a race; slower providers are abandoned
+IMAGE_DRAFT_DECODING = True # Decode JPEGs at the smallest 1/2, 1/4 or 1/8 scale that still covers the display size
+IMAGE_DOWNLOAD_MAX_BYTES = 15_000_000 # Downloads are aborted past this many bytes (checked against Content-Length first)
+IMAGE_DOWNLOAD_MAX_PIXELS = 40_000_000 # Images whose header declares more pixels are rejected before the body is read
+IMAGE_DOWNLOAD_MIN_WIDTH = 520 # Half the display box; smaller images would need heavy upscaling and are rejected
+IMAGE_DOWNLOAD_MIN_HEIGHT = 270
+IMAGE_DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+# --- Image Asset Cache ---
+IMAGE_ASSET_CACHE_ENABLED = True # Reuse fetched and generated images for queries, URLs and prompts seen before
+IMAGE_ASSET_CACHE_DIR = "output/image_cache" # Display-size JPEGs named by content hash, plus index.json
+IMAGE_ASSET_CACHE_MAX_BYTES = 50_000_000 # Least recently used images are dropped beyond this
+IMAGE_ASSET_CACHE_JPEG_QUALITY = 90
+
+# --- Output Encoding ---
+OUTPUT_IMAGE_FORMAT = "JPEG" # "JPEG", "WEBP" or "PNG"; the Instagram Graph API only documents JPEG support
+OUTPUT_FLATTEN_ALPHA = True # Composite RGBA onto OUTPUT_FLATTEN_BACKGROUND for every format (JPEG always is)
+OUTPUT_FLATTEN_BACKGROUND = (255, 255, 255)
+OUTPUT_JPEG_QUALITY = 92
+OUTPUT_JPEG_PROGRESSIVE = True
+OUTPUT_JPEG_OPTIMIZE = True # Optimized Huffman tables: a little slower, a few percent smaller
+OUTPUT_JPEG_SUBSAMPLING = 0 # 0 = 4:4:4, keeps headline and summary text edges crisp; 2 = 4:2:0 is smaller
+OUTPUT_WEBP_QUALITY = 90
+OUTPUT_WEBP_METHOD = 4 # 0 (fast) to 6 (smallest)
+OUTPUT_WEBP_LOSSLESS = False
+OUTPUT_PNG_COMPRESS_LEVEL = 6 # 0 (fast) to 9 (smallest)
+OUTPUT_PNG_OPTIMIZE = False # True tries harder for size at a large encode-time cost
+OUTPUT_ENCODER_COMPARE_FORMATS = False # Print encode time and size of the first post in every format
+
+# --- Circuit Breakers ---
+CIRCUIT_BREAKER_ENABLED = True # Skip stock photo providers, HF endpoints and LLM models that keep failing
+CIRCUIT_BREAKER_FILE = f"{JSON_OUTPUT_DIR}/circuit_breakers.json" # Committed next to state.json so it survives across runs
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 3 # Consecutive failures that open a circuit
+CIRCUIT_BREAKER_COOLDOWN_SECONDS = 1800 # How long an open circuit is skipped before a probe is let through
+CIRCUIT_BREAKER_MAX_COOLDOWN_SECONDS = 24 * 3600 # Each failed probe doubles the cool-down up to this
 
 
 # --- Analysis Configuration ---
@@ -88,6 +195,8 @@ INSTA_COLOR_VERY_LIGHT_GRAY = (249, 247, 247, 255) # #F9F7F7
 
 COLOR_GRADIENT_TOP_LEFT = INSTA_COLOR_VERY_LIGHT_GRAY
 COLOR_GRADIENT_BOTTOM_RIGHT = INSTA_COLOR_LIGHT_BLUE
+BACKGROUND_GRADIENT_DIRECTION = "vertical" # "vertical" (top to bottom) or "diagonal" (top-left to bottom-right)
+GRADIENT_CACHE_MAX_ENTRIES = 8 # Rendered backgrounds kept per process, keyed by size and colors
 
 COLOR_HEADLINE_TEXT = INSTA_COLOR_DARK_BLUE
 COLOR_SUMMARY_TEXT = INSTA_COLOR_DARK_BLUE
@@ -119,6 +228,20 @@ FONT_SIZE_SOURCE = 35 # Not used for display
 FONT_SIZE_QUOTE = 60 # Large and prominent for quotes
 FONT_SIZE_QUOTE_AUTHOR = 30 # Slightly smaller for author
 
+# --- Font Registry ---
+FONT_CACHE_MAX_ENTRIES = 32 # Upper bound on (path, size) pairs kept loaded per process
+# (path, size) pairs loaded once at startup so the first render does not pay for disk reads
+FONT_PRELOAD_SET = [
+    (FONT_PATH_ALFA_SLAB_ONE, FONT_SIZE_TOP_LEFT_TEXT),
+    (FONT_PATH_REGULAR, FONT_SIZE_TIMESTAMP),
+    (FONT_PATH_ALFA_SLAB_ONE, FONT_SIZE_HEADLINE),
+    (FONT_PATH_TAPESTRY, FONT_SIZE_SUMMARY),
+    (FONT_PATH_REGULAR, FONT_SIZE_SUMMARY),
+    (FONT_PATH_ALFA_SLAB_ONE, FONT_SIZE_QUOTE),
+    (FONT_PATH_REGULAR, FONT_SIZE_QUOTE_AUTHOR),
+]
+TEXT_METRICS_MAX_WORDS_PER_FONT = 5000 # Per-font word width cache is reset once it grows past this
+
 
 # --- Padding and Margins ---
 LEFT_PADDING = 20
@@ -136,6 +259,9 @@ IMAGE_DISPLAY_WIDTH = CANVAS_WIDTH - (LEFT_PADDING + RIGHT_PADDING)
 IMAGE_DISPLAY_HEIGHT = int(CANVAS_HEIGHT * 0.40)
 IMAGE_TOP_MARGIN_FROM_TOP_ELEMENTS = 35
 IMAGE_ROUND_RADIUS = 28
+IMAGE_SHADOW_OFFSET = 8
+IMAGE_SHADOW_BLUR_RADIUS = 8
+IMAGE_SHADOW_COLOR = (0, 0, 0, 80)
 
 TITLE_TOP_MARGIN_FROM_IMAGE = 30
 TITLE_MAX_WORDS = 5
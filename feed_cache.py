@@ -0,0 +1,96 @@
+# feed_cache.py
+import json
+import os
+import threading
+from datetime import datetime, UTC
+from config import FEED_CACHE_FILE, FEED_CACHE_MAX_ENTRIES_PER_FEED
+from atomic_file import write_snapshot
+
+class FeedCache:
+    """
+    Persists the ETag/Last-Modified validators and the parsed entries of each RSS feed,
+    so unchanged feeds can be revalidated with a conditional GET and served from disk on a 304.
+    """
+
+    def __init__(self, cache_file=FEED_CACHE_FILE):
+        self.cache_file = cache_file
+        self.feeds = {}
+        self.hits = 0 # 304 responses served from the cache
+        self.misses = 0 # full downloads
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Loads cached feeds from the JSON cache file."""
+        if not os.path.exists(self.cache_file):
+            print(f"Feed cache {self.cache_file} not found. Starting with an empty cache.")
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.feeds = data
+            print(f"Feed cache loaded: {len(self.feeds)} feeds.")
+        except json.JSONDecodeError:
+            print(f"Feed cache {self.cache_file} is corrupted. Starting with an empty cache.")
+        except Exception as e:
+            print(f"Error loading feed cache {self.cache_file}: {e}. Starting with an empty cache.")
+
+    def _snapshot(self):
+        with self._lock:
+            if not self._dirty:
+                return None
+            self._dirty = False
+            return json.dumps(self.feeds)
+
+    def save(self):
+        """Writes the cache back to disk if anything changed."""
+        try:
+            if write_snapshot(self.cache_file, self._snapshot):
+                print(f"Feed cache saved: {len(self.feeds)} feeds, {self.hits} not-modified hits, {self.misses} full downloads this run.")
+        except Exception as e:
+            print(f"Error saving feed cache {self.cache_file}: {e}")
+
+    def conditional_headers(self, url):
+        """Returns If-None-Match/If-Modified-Since headers for url, or {} if it is not cached."""
+        with self._lock:
+            cached = self.feeds.get(url)
+        if not cached:
+            return {}
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        return headers
+
+    def get_not_modified(self, url):
+        """Returns the cached (feed_title, entries) for url after a 304, or None if nothing is cached."""
+        with self._lock:
+            cached = self.feeds.get(url)
+            if not cached:
+                return None
+            cached['checked_at'] = datetime.now(UTC).isoformat()
+            self.hits += 1
+            self._dirty = True
+            return cached.get('feed_title', 'Unknown RSS'), cached.get('entries', [])
+
+    def store(self, url, etag, last_modified, feed_title, entries):
+        """Records a fresh download of url along with its validators."""
+        with self._lock:
+            self.misses += 1
+            self._dirty = True
+            if not etag and not last_modified:
+                # Without validators the feed can never be revalidated, so there is nothing to keep.
+                self.feeds.pop(url, None)
+                return
+            now = datetime.now(UTC).isoformat()
+            self.feeds[url] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'feed_title': feed_title,
+                'entries': entries[:FEED_CACHE_MAX_ENTRIES_PER_FEED],
+                'fetched_at': now,
+                'checked_at': now,
+            }
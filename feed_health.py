@@ -0,0 +1,135 @@
+# feed_health.py
+import json
+import os
+import random
+import statistics
+import threading
+from datetime import datetime, timedelta, UTC
+from config import (
+    FEED_HEALTH_FILE, FEED_HEALTH_LATENCY_SAMPLES, FEED_HEALTH_EXPLORATION_RATE,
+    FEED_HEALTH_DEMOTE_AFTER_FAILURES, FEED_HEALTH_RETRY_DEMOTED_HOURS, RSS_FEED_TIMEOUT_SECONDS
+)
+from atomic_file import write_snapshot
+
+class FeedHealthTracker:
+    """
+    Persists per-feed health stats (success rate, recent latencies, bozo rate and when the feed
+    last produced a fresh article) and uses them to order a category's sources so that fast,
+    productive feeds are tried first.
+    """
+
+    def __init__(self, stats_file=FEED_HEALTH_FILE):
+        self.stats_file = stats_file
+        self.feeds = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Loads feed stats from the JSON stats file."""
+        if not os.path.exists(self.stats_file):
+            print(f"Feed health file {self.stats_file} not found. All feeds start unscored.")
+            return
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.feeds = data
+            print(f"Feed health loaded: {len(self.feeds)} feeds.")
+        except json.JSONDecodeError:
+            print(f"Feed health file {self.stats_file} is corrupted. All feeds start unscored.")
+        except Exception as e:
+            print(f"Error loading feed health file {self.stats_file}: {e}. All feeds start unscored.")
+
+    def _snapshot(self):
+        with self._lock:
+            if not self._dirty:
+                return None
+            self._dirty = False
+            return json.dumps(self.feeds, indent=2)
+
+    def save(self):
+        """Writes the stats back to disk if anything changed."""
+        try:
+            write_snapshot(self.stats_file, self._snapshot)
+        except Exception as e:
+            print(f"Error saving feed health file {self.stats_file}: {e}")
+
+    def record(self, url, latency_seconds, success, bozo=False, fresh=False):
+        """Records the outcome of one fetch of url."""
+        now = datetime.now(UTC).isoformat()
+        with self._lock:
+            stats = self.feeds.setdefault(url, {
+                'attempts': 0, 'successes': 0, 'bozo': 0, 'fresh': 0, 'consecutive_failures': 0,
+                'latencies': [], 'last_attempt_at': None, 'last_fresh_at': None,
+            })
+            stats['attempts'] += 1
+            stats['last_attempt_at'] = now
+            stats['latencies'] = (stats['latencies'] + [round(latency_seconds, 3)])[-FEED_HEALTH_LATENCY_SAMPLES:]
+            if success:
+                stats['successes'] += 1
+                stats['consecutive_failures'] = 0
+            else:
+                stats['consecutive_failures'] += 1
+            if bozo:
+                stats['bozo'] += 1
+            if fresh:
+                stats['fresh'] += 1
+                stats['last_fresh_at'] = now
+            self._dirty = True
+
+    def _is_demoted(self, stats):
+        """A feed that keeps failing is benched until FEED_HEALTH_RETRY_DEMOTED_HOURS have passed."""
+        if stats['consecutive_failures'] < FEED_HEALTH_DEMOTE_AFTER_FAILURES:
+            return False
+        last_attempt = datetime.fromisoformat(stats['last_attempt_at'])
+        return datetime.now(UTC) - last_attempt < timedelta(hours=FEED_HEALTH_RETRY_DEMOTED_HOURS)
+
+    def score(self, url):
+        """
+        Higher is better: smoothed success and fresh-article rates, penalized for parse problems,
+        divided by the median latency. Unknown feeds get an optimistic prior so they are explored.
+        """
+        with self._lock:
+            stats = self.feeds.get(url)
+            if not stats:
+                return 1.0 / (RSS_FEED_TIMEOUT_SECONDS / 4)
+            attempts = stats['attempts']
+            success_rate = (stats['successes'] + 1) / (attempts + 2)
+            fresh_rate = (stats['fresh'] + 1) / (attempts + 2)
+            bozo_rate = stats['bozo'] / attempts if attempts else 0.0
+            median_latency = statistics.median(stats['latencies']) if stats['latencies'] else RSS_FEED_TIMEOUT_SECONDS / 2
+        return success_rate * fresh_rate * (1.0 - 0.5 * bozo_rate) / (median_latency + 0.25)
+
+    def order_sources(self, sources):
+        """
+        Returns (active, demoted). Active feeds are in a score-weighted random order, so lower-ranked
+        feeds still get tried now and then; with probability FEED_HEALTH_EXPLORATION_RATE the order
+        is fully random. Demoted feeds are those benched after repeated failures.
+        """
+        with self._lock:
+            demoted_urls = {url for url, stats in self.feeds.items() if self._is_demoted(stats)}
+        active = [source for source in sources if source['url'] not in demoted_urls]
+        demoted = [source for source in sources if source['url'] in demoted_urls]
+
+        if random.random() < FEED_HEALTH_EXPLORATION_RATE:
+            random.shuffle(active)
+        else:
+            # Weighted sampling without replacement: sort by u ** (1 / weight).
+            active.sort(key=lambda source: random.random() ** (1.0 / max(self.score(source['url']), 1e-6)), reverse=True)
+        if demoted:
+            print(f"Demoted feeds (repeated failures): {', '.join(source['name'] for source in demoted)}")
+        return active, demoted
+
+    def report(self, sources):
+        """Prints the health stats of the given sources."""
+        for source in sources:
+            with self._lock:
+                stats = self.feeds.get(source['url'])
+            if not stats:
+                print(f"  {source['name']}: no history")
+                continue
+            median_latency = statistics.median(stats['latencies']) if stats['latencies'] else 0.0
+            print(f"  {source['name']}: score {self.score(source['url']):.3f}, "
+                  f"success {stats['successes']}/{stats['attempts']}, fresh {stats['fresh']}, bozo {stats['bozo']}, "
+                  f"median {median_latency * 1000:.0f} ms, last fresh {stats['last_fresh_at'] or 'never'}")
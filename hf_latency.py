@@ -0,0 +1,74 @@
+# hf_latency.py
+import json
+import os
+import statistics
+import threading
+from config import HF_LATENCY_FILE, HF_LATENCY_HISTORY, HF_REQUEST_TIMEOUT_SECONDS
+from atomic_file import write_snapshot
+
+class HFEndpointStats:
+    """
+    Persists recent outcomes of each Hugging Face inference endpoint: latencies of successful
+    generations, and whether each recent attempt produced an image (a 503 "model loading" counts
+    as a miss). Used to try reliable, fast endpoints first.
+    """
+
+    def __init__(self, stats_file=HF_LATENCY_FILE):
+        self.stats_file = stats_file
+        self.endpoints = {} # endpoint -> {'latencies': [...], 'outcomes': [1 or 0, ...]}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Loads endpoint stats from the JSON stats file."""
+        if not os.path.exists(self.stats_file):
+            return
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.endpoints = data
+        except Exception as e:
+            print(f"Error loading Hugging Face endpoint stats {self.stats_file}: {e}. Starting without history.")
+
+    def _snapshot(self):
+        with self._lock:
+            if not self._dirty:
+                return None
+            self._dirty = False
+            return json.dumps(self.endpoints)
+
+    def save(self):
+        """Writes the stats back to disk if anything changed."""
+        try:
+            write_snapshot(self.stats_file, self._snapshot)
+        except Exception as e:
+            print(f"Error saving Hugging Face endpoint stats {self.stats_file}: {e}")
+
+    def record(self, endpoint, seconds, success):
+        """Records one attempt on endpoint; the latency is only kept for successful generations."""
+        with self._lock:
+            stats = self.endpoints.setdefault(endpoint, {'latencies': [], 'outcomes': []})
+            if success:
+                stats['latencies'] = (stats['latencies'] + [round(seconds, 3)])[-HF_LATENCY_HISTORY:]
+            stats['outcomes'] = (stats['outcomes'] + [1 if success else 0])[-HF_LATENCY_HISTORY:]
+            self._dirty = True
+
+    def expected_latency(self, endpoint):
+        """Median latency of recent successful generations, or the request timeout when there are none."""
+        with self._lock:
+            latencies = list(self.endpoints.get(endpoint, {}).get('latencies', ()))
+        return statistics.median(latencies) if latencies else float(HF_REQUEST_TIMEOUT_SECONDS)
+
+    def order(self, endpoints):
+        """
+        Sorts endpoints by expected time to an image: median latency divided by the smoothed
+        success rate. Endpoints without history keep their configured position among equals.
+        """
+        def expected_time(endpoint):
+            with self._lock:
+                outcomes = list(self.endpoints.get(endpoint, {}).get('outcomes', ()))
+            success_rate = (sum(outcomes) + 1) / (len(outcomes) + 2)
+            return self.expected_latency(endpoint) / success_rate
+        return sorted(endpoints, key=expected_time)
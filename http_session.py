@@ -0,0 +1,73 @@
+# http_session.py
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import (
+    HTTP_POOL_MAX_HOSTS, HTTP_POOL_MAX_CONNECTIONS_PER_HOST, HTTP_RETRY_TOTAL,
+    HTTP_RETRY_BACKOFF_FACTOR, HTTP_RETRY_STATUS_CODES
+)
+
+class HTTPSessionFactory:
+    """
+    Hands out requests sessions that share one set of keep-alive connection pools (one pool per
+    host), so repeated calls to the same API or CDN reuse their TCP+TLS connection. Each thread
+    gets its own Session object (Session itself is not thread-safe), but all of them are mounted
+    on the same adapters, whose urllib3 pools are.
+
+    Retries: connection failures are retried for every method, since nothing was sent. Read
+    errors and HTTP_RETRY_STATUS_CODES are only retried for idempotent methods, so a Graph API
+    publish or a Hugging Face generation is never sent twice; callers handle those themselves.
+    """
+
+    def __init__(self, max_hosts=HTTP_POOL_MAX_HOSTS, max_connections_per_host=HTTP_POOL_MAX_CONNECTIONS_PER_HOST):
+        retry = Retry(
+            total=HTTP_RETRY_TOTAL,
+            backoff_factor=HTTP_RETRY_BACKOFF_FACTOR,
+            status_forcelist=HTTP_RETRY_STATUS_CODES,
+            allowed_methods=frozenset({'GET', 'HEAD', 'OPTIONS'}),
+            respect_retry_after_header=True,
+            raise_on_status=False, # Hand the last response to the caller's raise_for_status()
+        )
+        self.adapter = HTTPAdapter(pool_connections=max_hosts, pool_maxsize=max_connections_per_host, max_retries=retry)
+        self._local = threading.local()
+
+    def get_session(self):
+        """Returns the calling thread's session."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('https://', self.adapter)
+            session.mount('http://', self.adapter)
+            self._local.session = session
+        return session
+
+    def get(self, url, **kwargs):
+        return self.get_session().get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.get_session().post(url, **kwargs)
+
+    def stats(self):
+        """Returns {host: (requests, connections opened)} for the pools that are still alive."""
+        pools = self.adapter.poolmanager.pools
+        stats = {}
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_made, opened = stats.get(pool.host, (0, 0))
+            stats[pool.host] = (requests_made + pool.num_requests, opened + pool.num_connections)
+        return stats
+
+    def report_stats(self):
+        """Prints per-host request and connection counts; every request beyond the first per connection was a reuse."""
+        stats = self.stats()
+        if not stats:
+            return
+        total_requests = sum(requests_made for requests_made, _ in stats.values())
+        total_opened = sum(opened for _, opened in stats.values())
+        print(f"HTTP connection reuse: {total_requests} requests over {total_opened} connections "
+              f"({total_requests - total_opened} reused) across {len(stats)} hosts.")
+        for host, (requests_made, opened) in sorted(stats.items(), key=lambda item: -item[1][0]):
+            print(f"  {host}: {requests_made} requests, {opened} connections")
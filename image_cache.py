@@ -0,0 +1,175 @@
+# image_cache.py
+import hashlib
+import io
+import json
+import os
+import threading
+from datetime import datetime, UTC
+from PIL import Image, ImageOps
+from config import (
+    IMAGE_ASSET_CACHE_ENABLED, IMAGE_ASSET_CACHE_DIR, IMAGE_ASSET_CACHE_MAX_BYTES, IMAGE_ASSET_CACHE_JPEG_QUALITY,
+    IMAGE_DISPLAY_WIDTH, IMAGE_DISPLAY_HEIGHT
+)
+from atomic_file import write_snapshot
+
+class ImageAssetCache:
+    """
+    Content-addressed disk cache of fetched and generated news images. Entries are keyed by a
+    hash of where the image came from (stock photo provider plus normalized query or source URL,
+    or Hugging Face model plus prompt) and point to a JPEG, named by its own hash, that is already
+    cropped and resized to the display box, so a hit costs one small decode and no network. Once
+    the files exceed IMAGE_ASSET_CACHE_MAX_BYTES the least recently used entries are dropped.
+    """
+
+    def __init__(self, cache_dir=IMAGE_ASSET_CACHE_DIR, max_bytes=IMAGE_ASSET_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.index_file = os.path.join(cache_dir, 'index.json')
+        self.max_bytes = max_bytes
+        self.entries = {} # key -> {'file', 'bytes', 'source', 'created_at', 'last_used_at'}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        if IMAGE_ASSET_CACHE_ENABLED:
+            self._load()
+
+    def _load(self):
+        """Loads the cache index, dropping entries whose file has disappeared."""
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.entries = {key: entry for key, entry in data.items()
+                                if os.path.exists(os.path.join(self.cache_dir, entry['file']))}
+            print(f"Image asset cache loaded: {len(self.entries)} entries.")
+        except Exception as e:
+            print(f"Error loading image asset cache index {self.index_file}: {e}. Starting with an empty cache.")
+
+    def _snapshot(self):
+        with self._lock:
+            if not self._dirty:
+                return None
+            self._dirty = False
+            return json.dumps(self.entries)
+
+    def save(self):
+        """Writes the index to disk if it changed."""
+        try:
+            write_snapshot(self.index_file, self._snapshot)
+        except Exception as e:
+            print(f"Error saving image asset cache index {self.index_file}: {e}")
+
+    @staticmethod
+    def normalize_query(query):
+        return ' '.join(str(query).lower().split())
+
+    @staticmethod
+    def make_key(*parts):
+        """Hashes the parts identifying an image, e.g. ('pexels', 'query', normalized_query) or ('hf', model, prompt)."""
+        return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def get(self, *keys):
+        """Returns the cached display-size image of the first key present, or None. Counts as one lookup."""
+        if not IMAGE_ASSET_CACHE_ENABLED:
+            return None
+        for key in keys:
+            with self._lock:
+                entry = self.entries.get(key)
+                if entry is None:
+                    continue
+                path = os.path.join(self.cache_dir, entry['file'])
+            try:
+                with Image.open(path) as cached:
+                    image = cached.convert('RGB')
+            except Exception as e:
+                print(f"Image asset cache entry {path} is unreadable ({e}); dropping it.")
+                with self._lock:
+                    self.entries.pop(key, None)
+                    self._dirty = True
+                continue
+            with self._lock:
+                entry['last_used_at'] = datetime.now(UTC).isoformat()
+                self._dirty = True
+                self.hits += 1
+            print(f"Image asset cache hit ({entry['source']}).")
+            return image
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, keys, image, source):
+        """
+        Crops and resizes image to the display box and stores it under every key in keys. Files
+        are named by the hash of their bytes, so keys for the same picture share one file.
+        Returns the display-size image.
+        """
+        if not IMAGE_ASSET_CACHE_ENABLED or image is None:
+            return image
+        try:
+            display_image = ImageOps.fit(image.convert('RGB'), (IMAGE_DISPLAY_WIDTH, IMAGE_DISPLAY_HEIGHT), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            display_image.save(buffer, 'JPEG', quality=IMAGE_ASSET_CACHE_JPEG_QUALITY)
+        except Exception as e:
+            print(f"Could not prepare image from {source} for the asset cache: {e}")
+            return image
+        data = buffer.getvalue()
+        file_name = f"{hashlib.sha256(data).hexdigest()}.jpg"
+        path = os.path.join(self.cache_dir, file_name)
+        try:
+            if not os.path.exists(path):
+                os.makedirs(self.cache_dir, exist_ok=True)
+                temp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(temp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+        except Exception as e:
+            print(f"Error writing image asset cache file {path}: {e}")
+            return display_image
+        now = datetime.now(UTC).isoformat()
+        with self._lock:
+            for key in keys:
+                self.entries[key] = {'file': file_name, 'bytes': len(data), 'source': source, 'created_at': now, 'last_used_at': now}
+            self._dirty = True
+            self._evict()
+        return display_image
+
+    def alias(self, key, existing_key):
+        """Makes key point to the same cached image as existing_key."""
+        with self._lock:
+            entry = self.entries.get(existing_key)
+            if entry is not None:
+                self.entries[key] = dict(entry)
+                self._dirty = True
+
+    def _evict(self):
+        """
+        Drops least recently used entries until the files fit the byte budget, deleting a file
+        once no entry refers to it. Must be called with the lock held.
+        """
+        file_bytes = {entry['file']: entry['bytes'] for entry in self.entries.values()}
+        total_bytes = sum(file_bytes.values())
+        for key in sorted(self.entries, key=lambda k: self.entries[k]['last_used_at']):
+            if total_bytes <= self.max_bytes:
+                break
+            entry = self.entries.pop(key)
+            if any(other['file'] == entry['file'] for other in self.entries.values()):
+                continue
+            total_bytes -= entry['bytes']
+            try:
+                os.remove(os.path.join(self.cache_dir, entry['file']))
+            except OSError:
+                pass
+
+    def report_stats(self):
+        """Prints the hit rate for this process and the cache size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            file_bytes = {entry['file']: entry['bytes'] for entry in self.entries.values()}
+        stored_bytes = sum(file_bytes.values())
+        stored = len(file_bytes)
+        if not lookups:
+            return
+        print(f"Image asset cache: {self.hits}/{lookups} hits ({self.hits / lookups:.0%}), "
+              f"{stored} images, {stored_bytes / 1e6:.1f} MB stored.")
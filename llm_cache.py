@@ -0,0 +1,170 @@
+# llm_cache.py
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta, UTC
+from config import LLM_CACHE_ENABLED, LLM_CACHE_FILE, LLM_CACHE_TTL_HOURS, LLM_CACHE_MAX_BYTES, LLM_STREAMING_ENABLED
+from atomic_file import write_snapshot
+from llm_stream import read_streamed_completion
+
+class LLMResponseCache:
+    """
+    Disk-backed cache of chat completion texts, keyed by a hash of (model, messages, temperature,
+    max_tokens), so re-running a post after a downstream failure (Cloudinary, Graph API) does not
+    repeat identical OpenRouter calls. Entries expire after LLM_CACHE_TTL_HOURS; once the stored
+    texts exceed LLM_CACHE_MAX_BYTES the least recently used ones are evicted.
+    """
+
+    def __init__(self, cache_file=LLM_CACHE_FILE, ttl_hours=LLM_CACHE_TTL_HOURS, max_bytes=LLM_CACHE_MAX_BYTES, model_chain=None):
+        self.cache_file = cache_file
+        self.model_chain = model_chain # ModelChain used when a call passes a list of models
+        self.ttl = timedelta(hours=ttl_hours)
+        self.max_bytes = max_bytes
+        self.entries = None # key -> {'content', 'created_at', 'last_used_at'}; loaded on first use
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model, messages, temperature, max_tokens, scope=None):
+        """
+        Hashes the request. `scope` separates otherwise identical prompts that must not share an
+        answer, e.g. two quote posts of the same batch.
+        """
+        payload = json.dumps([model, messages, temperature, max_tokens, scope], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _ensure_loaded(self):
+        """Loads the cache file on first use. Must be called with the lock held."""
+        if self.entries is not None:
+            return
+        self.entries = {}
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.entries = data
+            print(f"LLM response cache loaded: {len(self.entries)} responses.")
+        except json.JSONDecodeError:
+            print(f"LLM response cache {self.cache_file} is corrupted. Starting with an empty cache.")
+        except Exception as e:
+            print(f"Error loading LLM response cache {self.cache_file}: {e}. Starting with an empty cache.")
+
+    def get(self, key):
+        """Returns the cached text for key, or None if it is missing or expired."""
+        with self._lock:
+            self._ensure_loaded()
+            entry = self.entries.get(key)
+            now = datetime.now(UTC)
+            if entry and now - datetime.fromisoformat(entry['created_at']) < self.ttl:
+                entry['last_used_at'] = now.isoformat()
+                self.hits += 1
+                return entry['content']
+            self.misses += 1
+            return None
+
+    def put(self, key, content):
+        """Stores a response text, then evicts expired and least recently used entries."""
+        now = datetime.now(UTC).isoformat()
+        with self._lock:
+            self._ensure_loaded()
+            self.entries[key] = {'content': content, 'created_at': now, 'last_used_at': now}
+            self._evict()
+
+    def _evict(self):
+        cutoff = datetime.now(UTC) - self.ttl
+        for key in [key for key, entry in self.entries.items() if datetime.fromisoformat(entry['created_at']) < cutoff]:
+            del self.entries[key]
+        total_bytes = sum(len(entry['content'].encode('utf-8')) for entry in self.entries.values())
+        for key in sorted(self.entries, key=lambda k: self.entries[k]['last_used_at']):
+            if total_bytes <= self.max_bytes:
+                break
+            total_bytes -= len(self.entries[key]['content'].encode('utf-8'))
+            del self.entries[key]
+
+    def _snapshot(self):
+        with self._lock:
+            return None if self.entries is None else json.dumps(self.entries)
+
+    def save(self):
+        """Writes the cache to disk."""
+        try:
+            write_snapshot(self.cache_file, self._snapshot)
+        except Exception as e:
+            print(f"Error saving LLM response cache {self.cache_file}: {e}")
+
+    def complete(self, client, model, messages, temperature, max_tokens, scope=None, stream=None, **request_kwargs):
+        """
+        Returns the text of a chat completion, from the cache when possible. `model` may be a list,
+        in which case the call runs through the model chain (fallbacks and hedging). With a
+        StreamSpec as `stream` and LLM_STREAMING_ENABLED, the response is streamed, its fields are
+        reported as they complete and reading stops once the spec is satisfied. Only non-empty
+        responses are stored, and JSON-mode responses only if they parse, so a bad answer is
+        retried on the next run instead of being replayed. API errors propagate to the caller.
+        """
+        key = self.make_key(model, messages, temperature, max_tokens, scope) if LLM_CACHE_ENABLED else None
+        if key is not None:
+            cached = self.get(key)
+            if cached is not None:
+                print(f"LLM response cache hit ({model if isinstance(model, str) else model[0]}).")
+                if stream is not None:
+                    stream.notify_all(cached)
+                return cached
+
+        stream_spec = stream if LLM_STREAMING_ENABLED else None
+        if isinstance(model, (list, tuple)):
+            content = self.model_chain.create(
+                client,
+                list(model),
+                stream_spec=stream_spec,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **request_kwargs
+            )
+        elif stream_spec is not None:
+            content = read_streamed_completion(client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                **request_kwargs
+            ), stream_spec)
+        else:
+            completion = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **request_kwargs
+            )
+            content = None
+            if completion.choices and completion.choices[0].message:
+                content = completion.choices[0].message.content
+        if stream is not None and stream_spec is None and content:
+            stream.notify_all(content)
+
+        if key is not None and content and self._is_cacheable(content, request_kwargs):
+            self.put(key, content)
+            self.save()
+        return content
+
+    @staticmethod
+    def _is_cacheable(content, request_kwargs):
+        if (request_kwargs.get('response_format') or {}).get('type') != 'json_object':
+            return True
+        try:
+            json.loads(content)
+            return True
+        except json.JSONDecodeError:
+            return False
+
+    def report_stats(self):
+        """Prints hit/miss counts for this process."""
+        with self._lock:
+            stored = len(self.entries) if self.entries is not None else 0
+        print(f"LLM response cache: {self.hits} hits, {self.misses} misses, {stored} responses stored.")
@@ -0,0 +1,186 @@
+# llm_chain.py
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import wait, FIRST_COMPLETED
+from llm_stream import read_streamed_completion
+from racing import racing_executor
+from config import (
+    LLM_LATENCY_FILE, LLM_LATENCY_HISTORY, LLM_MAX_ATTEMPTS, LLM_REQUEST_TIMEOUT_SECONDS, LLM_CALL_DEADLINE_SECONDS,
+    LLM_BACKOFF_BASE_SECONDS, LLM_BACKOFF_MAX_SECONDS, LLM_HEDGE_ENABLED, LLM_HEDGE_MIN_SAMPLES, LLM_HEDGE_DEFAULT_DELAY_SECONDS
+)
+from atomic_file import write_snapshot
+
+class ModelChain:
+    """
+    Runs a chat completion against a chain of OpenRouter models. Each attempt has its own timeout
+    and the whole call has a deadline. A failed attempt (429, error, empty answer) moves on to the
+    next model after a jittered exponential backoff. If the running model takes longer than its p90
+    latency, the next model is hedged in parallel; the first usable answer wins and the other
+    request is abandoned.
+    """
+
+    def __init__(self, latency_file=LLM_LATENCY_FILE, breakers=None):
+        self.latency_file = latency_file
+        self.breakers = breakers # Optional CircuitBreakerRegistry; models with an open circuit are skipped
+        self.latencies = {} # model -> deque of recent successful latencies in seconds
+        self._loaded = False
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        """Loads the latency history on first use. Must be called with the lock held."""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.latency_file):
+            return
+        try:
+            with open(self.latency_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.latencies = {model: deque(samples, maxlen=LLM_LATENCY_HISTORY) for model, samples in data.items()}
+        except Exception as e:
+            print(f"Error loading LLM latency history {self.latency_file}: {e}. Starting without history.")
+
+    def _snapshot(self):
+        with self._lock:
+            if not self._dirty:
+                return None
+            self._dirty = False
+            return json.dumps({model: list(samples) for model, samples in self.latencies.items()})
+
+    def save(self):
+        """Writes the latency history to disk if it changed."""
+        try:
+            write_snapshot(self.latency_file, self._snapshot)
+        except Exception as e:
+            print(f"Error saving LLM latency history {self.latency_file}: {e}")
+
+    def _record_latency(self, model, seconds):
+        with self._lock:
+            self._ensure_loaded()
+            self.latencies.setdefault(model, deque(maxlen=LLM_LATENCY_HISTORY)).append(round(seconds, 3))
+            self._dirty = True
+
+    def hedge_delay(self, model):
+        """Seconds to wait on model before hedging: its p90 latency, or a default until there is enough history."""
+        with self._lock:
+            self._ensure_loaded()
+            samples = sorted(self.latencies.get(model, ()))
+        if len(samples) < LLM_HEDGE_MIN_SAMPLES:
+            return LLM_HEDGE_DEFAULT_DELAY_SECONDS
+        return samples[min(len(samples) - 1, int(0.9 * len(samples)))]
+
+    @staticmethod
+    def backoff_delay(attempt):
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+    def _attempt(self, client, model, timeout, request, stream_spec, attempt, abandoned):
+        """
+        One request to model. The SDK's own retries are turned off so a 429 or timeout fails over to
+        the next model at once. Once abandoned is set (the call returned or gave up) the outcome no
+        longer counts towards the model's circuit or latency history.
+        """
+        client = client.with_options(max_retries=0)
+        start = time.perf_counter()
+        try:
+            if stream_spec is not None:
+                content = read_streamed_completion(
+                    client.chat.completions.create(model=model, timeout=timeout, stream=True, **request), stream_spec, attempt)
+            else:
+                completion = client.chat.completions.create(model=model, timeout=timeout, **request)
+                content = completion.choices[0].message.content if completion.choices and completion.choices[0].message else None
+            if not content:
+                raise ValueError(f"empty response from {model}")
+        except Exception:
+            if self.breakers is not None and not abandoned.is_set():
+                self.breakers.record_failure(f"llm:{model}")
+            raise
+        if abandoned.is_set():
+            return content
+        if self.breakers is not None:
+            self.breakers.record_success(f"llm:{model}")
+        self._record_latency(model, time.perf_counter() - start)
+        return content
+
+    def create(self, client, models, stream_spec=None, **request):
+        """
+        Returns the text of the first usable completion from the chain, or raises the last error.
+        With a StreamSpec the attempts are streamed and may stop early.
+        """
+        deadline = time.monotonic() + LLM_CALL_DEADLINE_SECONDS
+        in_flight = {} # future -> model
+        attempt_numbers = {} # future -> attempt number, which identifies the attempt to stream_spec
+        abandoned = threading.Event() # Set once this call is over, for attempts still running
+        attempts = 0
+        position = 0 # Next model in the chain, skipped models included
+        last_error = None
+
+        def launch():
+            """Starts an attempt on the next model not in flight whose circuit allows it. Returns False if there is none."""
+            nonlocal attempts, position
+            for _ in range(len(models)):
+                model = models[position % len(models)]
+                position += 1
+                if model in in_flight.values():
+                    continue # Hedge with a different model
+                if self.breakers is None or self.breakers.allow(f"llm:{model}"):
+                    break
+            else:
+                return False
+            attempts += 1
+            timeout = max(1.0, min(LLM_REQUEST_TIMEOUT_SECONDS, deadline - time.monotonic()))
+            future = executor.submit(self._attempt, client, model, timeout, request, stream_spec, attempts, abandoned)
+            in_flight[future] = model
+            attempt_numbers[future] = attempts
+            return True
+
+        with racing_executor(2) as executor:
+            try:
+                if not launch():
+                    last_error = RuntimeError(f"circuits of all models are open: {', '.join(models)}")
+                while in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    can_hedge = LLM_HEDGE_ENABLED and len(in_flight) == 1 and attempts < LLM_MAX_ATTEMPTS and len(models) > 1
+                    wait_for = min(remaining, self.hedge_delay(next(iter(in_flight.values())))) if can_hedge else remaining
+
+                    done, _ = wait(in_flight, timeout=wait_for, return_when=FIRST_COMPLETED)
+                    if not done:
+                        if can_hedge:
+                            print(f"LLM call to {next(iter(in_flight.values()))} is slower than its p90; hedging with the next model.")
+                            launch()
+                        continue
+
+                    for future in done:
+                        model = in_flight.pop(future)
+                        try:
+                            content = future.result()
+                        except Exception as e:
+                            print(f"LLM attempt with {model} failed: {e}")
+                            last_error = e
+                            if stream_spec is not None:
+                                stream_spec.release(attempt_numbers[future])
+                            continue
+                        if in_flight:
+                            print(f"{model} answered first; abandoning {', '.join(in_flight.values())}.")
+                        if stream_spec is not None:
+                            stream_spec.settle(attempt_numbers[future], content)
+                        return content
+
+                    if not in_flight and attempts < LLM_MAX_ATTEMPTS:
+                        time.sleep(min(self.backoff_delay(attempts - 1), max(0.0, deadline - time.monotonic())))
+                        launch()
+            finally:
+                abandoned.set()
+                self.save()
+                if self.breakers is not None:
+                    self.breakers.save()
+
+        raise last_error if last_error else TimeoutError(f"LLM call deadline of {LLM_CALL_DEADLINE_SECONDS}s exceeded")
@@ -0,0 +1,221 @@
+# llm_stream.py
+import json
+import re
+import threading
+
+class JSONFieldStream:
+    """
+    Incremental parser for the flat JSON objects our prompts ask for. Text chunks are fed in as
+    they stream; every top-level field is decoded as soon as its value is closed, and the string
+    value currently being written can be read back partially.
+    """
+
+    def __init__(self):
+        self.fields = {}
+        self.current_key = None
+        self._state = 'start'
+        self._raw = ''
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text):
+        """Consumes a chunk of the response. Returns the keys whose values were completed by it."""
+        completed = []
+        for ch in text:
+            state = self._state
+            if state == 'start':
+                if ch == '{':
+                    self._state = 'key_or_end'
+            elif state == 'key_or_end':
+                if ch == '"':
+                    self._raw, self._escape = '', False
+                    self._state = 'key'
+                elif ch == '}':
+                    self._state = 'done'
+            elif state == 'key':
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self.current_key = self._decode_string(self._raw)
+                    self._state = 'colon'
+                    continue
+                self._raw += ch
+            elif state == 'colon':
+                if ch == ':':
+                    self._state = 'value_start'
+            elif state == 'value_start':
+                if ch.isspace():
+                    continue
+                self._raw, self._escape = ch, False
+                self._in_string = ch == '"'
+                self._depth = 1 if ch in '[{' else 0
+                self._state = 'value'
+            elif state == 'value':
+                if self._consume_value_char(ch):
+                    completed.append(self.current_key)
+            elif state == 'after_value':
+                if ch == ',':
+                    self._state = 'key_or_end'
+                elif ch == '}':
+                    self._state = 'done'
+        return completed
+
+    def _consume_value_char(self, ch):
+        """Adds ch to the value being read. Returns True when the value is complete."""
+        if self._in_string:
+            self._raw += ch
+            if self._escape:
+                self._escape = False
+            elif ch == '\\':
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                if self._depth == 0:
+                    return self._complete_value('after_value')
+            return False
+
+        if ch == '"':
+            self._in_string = True
+        elif ch in '[{':
+            self._depth += 1
+        elif ch in ']}':
+            if self._depth == 0: # '}' closing the object ends a bare scalar
+                return self._complete_value('done')
+            self._depth -= 1
+            self._raw += ch
+            return self._complete_value('after_value') if self._depth == 0 else False
+        elif ch == ',' and self._depth == 0:
+            return self._complete_value('key_or_end')
+        self._raw += ch
+        return False
+
+    def _complete_value(self, next_state):
+        try:
+            self.fields[self.current_key] = json.loads(self._raw.strip())
+        except json.JSONDecodeError:
+            self.fields[self.current_key] = self._raw.strip()
+        self._state = next_state
+        return True
+
+    @staticmethod
+    def _decode_string(raw):
+        try:
+            return json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            return raw
+
+    @property
+    def done(self):
+        """True once the closing brace of the object has been read."""
+        return self._state == 'done'
+
+    def partial(self, key):
+        """Returns the decoded text so far of key's string value while it is still being streamed, else None."""
+        if self._state != 'value' or self.current_key != key or not self._raw.startswith('"'):
+            return None
+        raw = re.sub(r'\\u[0-9a-fA-F]{0,3}$', '', self._raw[1:])
+        if (len(raw) - len(raw.rstrip('\\'))) % 2: # drop a dangling escape backslash
+            raw = raw[:-1]
+        return self._decode_string(raw)
+
+
+class StreamSpec:
+    """
+    What a streamed call needs: the keys that must be present, optional word budgets for string
+    fields (generation stops once the budget is exceeded and every other required key is in), and
+    an on_field(key, value) callback fired once per key as soon as its value is complete.
+
+    With hedged requests the callbacks belong to one attempt at a time: the first attempt to
+    complete a field owns them, and if another attempt wins, settle() hands them over and reports
+    the winner's fields, so callers end up with the values of the response that is returned.
+    """
+
+    def __init__(self, required_keys, word_limits=None, on_field=None):
+        self.required_keys = tuple(required_keys)
+        self.word_limits = word_limits or {}
+        self.on_field = on_field
+        self._fired = set()
+        self._owner = None # Attempt whose fields on_field has been given
+        self._lock = threading.Lock()
+
+    def notify(self, key, value, attempt=None):
+        """Fires on_field once per key, ignoring attempts other than the one that owns the callbacks."""
+        if self.on_field is None:
+            return
+        with self._lock:
+            if attempt is not None:
+                if self._owner is None:
+                    self._owner = attempt
+                elif self._owner != attempt:
+                    return
+            if key in self._fired:
+                return
+            self._fired.add(key)
+        self.on_field(key, value)
+
+    def notify_all(self, content, attempt=None):
+        """Fires on_field for every field of an already complete response, e.g. a cache hit."""
+        try:
+            parsed = json.loads(content)
+        except (json.JSONDecodeError, TypeError):
+            return
+        if isinstance(parsed, dict):
+            for key, value in parsed.items():
+                self.notify(key, value, attempt)
+
+    def release(self, attempt):
+        """Called when attempt failed: another attempt may take over the callbacks."""
+        with self._lock:
+            if self._owner == attempt:
+                self._owner = None
+                self._fired.clear()
+
+    def settle(self, attempt, content):
+        """Called with the response of the winning attempt; reports its fields if another attempt owned the callbacks."""
+        with self._lock:
+            if self._owner != attempt:
+                self._owner = attempt
+                self._fired.clear()
+        self.notify_all(content, attempt)
+
+    def should_stop(self, parser):
+        """True once every required key is complete, or only a budgeted string is left and it is over budget."""
+        missing = [key for key in self.required_keys if key not in parser.fields]
+        if not missing:
+            return True
+        if len(missing) == 1 and missing[0] in self.word_limits:
+            partial = parser.partial(missing[0])
+            if partial is not None and len(partial.split()) > self.word_limits[missing[0]]:
+                parser.fields[missing[0]] = partial
+                return True
+        return False
+
+
+def read_streamed_completion(stream, spec, attempt=None):
+    """
+    Reads a streamed chat completion, firing spec callbacks as fields complete, and stops reading
+    as soon as spec is satisfied. attempt identifies the request when several stream into the same
+    spec. Returns the response text; after an early stop it is the JSON of the fields parsed so far.
+    """
+    parser = JSONFieldStream()
+    text = ''
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content if chunk.choices[0].delta else None
+            if not delta:
+                continue
+            text += delta
+            for key in parser.feed(delta):
+                spec.notify(key, parser.fields[key], attempt)
+            if spec.should_stop(parser):
+                return text if parser.done else json.dumps(parser.fields)
+    finally:
+        close = getattr(stream, 'close', None)
+        if close:
+            close()
+    return text
@@ -5,17 +5,26 @@ import json
 import os
 import pandas as pd
 from datetime import datetime, timedelta, UTC
-from PIL import Image, ImageDraw, ImageFont, ImageOps, ImageFilter
-import textwrap
+from PIL import Image, ImageDraw, ImageFont, ImageOps, ImageFilter, ImageChops, ImageFile
 import io
 import random
+import math
+import hashlib
 import feedparser
 import ssl
 import re
 import sys
+import time
+import threading
+import argparse
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED, TimeoutError as FuturesTimeoutError
+import weakref
+from urllib.parse import urlencode
 from openai import OpenAI
 import cloudinary
 import cloudinary.uploader
+from urllib3.util.request import ACCEPT_ENCODING
 
 # Fix for some SSL certificate issues with feedparser on some systems
 if hasattr(ssl, '_create_unverified_context'):
@@ -28,6 +37,7 @@ from config import (
     OPENROUTER_MISTRAL_API_KEY, OPENROUTER_MISTRAL_MODEL,
     OPENROUTER_DEEPSEEK_R1_API_KEY, OPENROUTER_DEEPSEEK_R1_MODEL,DIVIDER_LINE_THICKNESS,DIVIDER_Y_OFFSET_FROM_SUMMARY,
     HUGGING_FACE_TOKEN, INFERENCE_API_ENDPOINTS, # NEW: Hugging Face config
+    HF_GENERATION_MODE, HF_CONCURRENT_ENDPOINTS, HF_REQUEST_TIMEOUT_SECONDS, HF_GENERATION_DEADLINE_SECONDS, HF_MAX_LOADING_WAIT_SECONDS,
     PEXELS_API_KEY, PEXELS_API_URL,
     UNSPLASH_ACCESS_KEY, UNSPLASH_API_URL,
     OPENVERSE_API_URL,
@@ -41,7 +51,7 @@ from config import (
     CANVAS_WIDTH, CANVAS_HEIGHT,
     FONT_PATH_EXTRABOLD, FONT_PATH_BOLD, FONT_PATH_MEDIUM, FONT_PATH_REGULAR, FONT_PATH_LIGHT,
     FONT_PATH_ALFA_SLAB_ONE, FONT_PATH_TAPESTRY,
-    COLOR_GRADIENT_TOP_LEFT, COLOR_GRADIENT_BOTTOM_RIGHT,
+    COLOR_GRADIENT_TOP_LEFT, COLOR_GRADIENT_BOTTOM_RIGHT, BACKGROUND_GRADIENT_DIRECTION, GRADIENT_CACHE_MAX_ENTRIES,
     COLOR_HEADLINE_TEXT, COLOR_SUMMARY_TEXT, COLOR_TOP_LEFT_TEXT, COLOR_TIMESTAMP_TEXT,
     COLOR_SOURCE_BOX_FILL, COLOR_SOURCE_TEXT,
     COLOR_DIVIDER_LINE,
@@ -49,23 +59,44 @@ from config import (
     QUOTE_COLOR_ACCENT, QUOTE_COLOR_BACKGROUND_LIGHT, QUOTE_COLOR_TEXT_DARK,
     FONT_SIZE_TOP_LEFT_TEXT, FONT_SIZE_TIMESTAMP, FONT_SIZE_HEADLINE, FONT_SIZE_SUMMARY,
     FONT_SIZE_QUOTE, FONT_SIZE_QUOTE_AUTHOR,
+    FONT_CACHE_MAX_ENTRIES, FONT_PRELOAD_SET, TEXT_METRICS_MAX_WORDS_PER_FONT,
     LEFT_PADDING, RIGHT_PADDING, TOP_PADDING, BOTTOM_PADDING,
     TOP_LEFT_TEXT_POS_X, TOP_LEFT_TEXT_POS_Y,
     TIMESTAMP_POS_X_RIGHT_ALIGN, TIMESTAMP_POS_Y,
     IMAGE_DISPLAY_WIDTH, IMAGE_DISPLAY_HEIGHT, IMAGE_TOP_MARGIN_FROM_TOP_ELEMENTS, IMAGE_ROUND_RADIUS,
+    IMAGE_SHADOW_OFFSET, IMAGE_SHADOW_BLUR_RADIUS, IMAGE_SHADOW_COLOR,
     TITLE_TOP_MARGIN_FROM_IMAGE, TITLE_MAX_WORDS, TITLE_LINE_SPACING,
     SUMMARY_TOP_MARGIN_FROM_TITLE, SUMMARY_MIN_WORDS, SUMMARY_MAX_WORDS, SUMMARY_LINE_SPACING, SUMMARY_MAX_LINES,
     LOGO_PATH, LOGO_WIDTH, LOGO_HEIGHT, LOGO_BOTTOM_MARGIN,
     QUOTE_LOGO_WIDTH, QUOTE_LOGO_HEIGHT, QUOTE_LOGO_BOTTOM_MARGIN,
     QUOTE_BOX_HEIGHT, QUOTE_BOX_MARGIN_FROM_DIVIDER, QUOTE_TEXT_PADDING_X, QUOTE_TEXT_PADDING_Y, QUOTE_BOX_RADIUS,
-    CONTENT_TYPE_CYCLE
+    CONTENT_TYPE_CYCLE,
+    RSS_FETCH_MODE, RSS_CONCURRENT_STRATEGY, RSS_FEED_TIMEOUT_SECONDS, RSS_FETCH_DEADLINE_SECONDS, RSS_MAX_WORKERS, RSS_USER_AGENT,
+    CANDIDATE_POOL_LOW_WATERMARK,
+    LLM_POST_BUNDLE_MODE, LLM_TEXT_MODEL_CHAIN, LLM_CAPTION_MODEL_CHAIN, LLM_STREAMING_ENABLED,
+    IMAGE_FETCH_MODE, IMAGE_RACE_GRACE_SECONDS, IMAGE_RACE_DEADLINE_SECONDS, IMAGE_DRAFT_DECODING,
+    IMAGE_DOWNLOAD_MAX_BYTES, IMAGE_DOWNLOAD_MAX_PIXELS, IMAGE_DOWNLOAD_MIN_WIDTH, IMAGE_DOWNLOAD_MIN_HEIGHT, IMAGE_DOWNLOAD_CHUNK_BYTES,
+    OUTPUT_ENCODER_COMPARE_FORMATS
 )
 from state_manager import WorkflowStateManager
+from feed_cache import FeedCache
+from seen_index import SeenArticleIndex
+from feed_health import FeedHealthTracker
+from candidate_pool import CandidatePool
+from llm_cache import LLMResponseCache
+from llm_chain import ModelChain
+from llm_stream import StreamSpec
+from http_session import HTTPSessionFactory
+from hf_latency import HFEndpointStats
+from image_cache import ImageAssetCache
+from circuit_breaker import CircuitBreakerRegistry
+from output_encoder import OutputEncoder
+from racing import racing_executor
 
 # --- Utility Functions ---
 
-def load_font(font_path, size):
-    """Loads a font with error handling."""
+def _load_font_from_disk(font_path, size):
+    """Loads a font from disk with error handling."""
     try:
         return ImageFont.truetype(font_path, size)
     except IOError:
@@ -79,128 +110,413 @@ def load_font(font_path, size):
         print(f"Error loading font {font_path}: {e}. Falling back to default.")
         return ImageFont.load_default()
 
-def wrap_text_by_word_count(text, font, max_width_pixels, max_words=None):
+
+class FontRegistry:
+    """Process-wide, bounded cache of ImageFont instances keyed by (font_path, size)."""
+
+    def __init__(self, max_entries=FONT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._fonts = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.load_time_seconds = 0.0
+
+    def get(self, font_path, size):
+        """Returns the cached font for (font_path, size), loading it from disk on first use."""
+        key = (font_path, size)
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is not None:
+                self._fonts.move_to_end(key)
+                self.hits += 1
+                return font
+
+        start = time.perf_counter()
+        font = _load_font_from_disk(font_path, size)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.misses += 1
+            self.load_time_seconds += elapsed
+            self._fonts[key] = font
+            self._fonts.move_to_end(key)
+            while len(self._fonts) > self.max_entries:
+                self._fonts.popitem(last=False)
+        return font
+
+    def preload(self, font_specs=FONT_PRELOAD_SET):
+        """Loads every (font_path, size) pair in font_specs so later renders hit the cache."""
+        start = time.perf_counter()
+        for font_path, size in font_specs:
+            self.get(font_path, size)
+        print(f"Preloaded {len(font_specs)} fonts in {(time.perf_counter() - start) * 1000:.1f} ms.")
+
+    def report_stats(self):
+        """Prints cache hits/misses and the total time spent loading fonts from disk."""
+        print(f"Font registry: {self.hits} hits, {self.misses} misses, {len(self._fonts)} cached, "
+              f"{self.load_time_seconds * 1000:.1f} ms spent loading fonts from disk.")
+
+
+font_registry = FontRegistry()
+
+
+def load_font(font_path, size):
+    """Loads a font through the process-wide font registry."""
+    return font_registry.get(font_path, size)
+
+TextLine = namedtuple('TextLine', ['text', 'width', 'height'])
+
+
+class TextLayoutEngine:
     """
-    Wraps text to fit within a given pixel width and optionally truncates by word count,
-    returning a list of lines.
-    Uses a dummy ImageDraw.Draw object for accurate textbbox calculation.
+    Wraps and measures text in a single linear pass using cached per-font word metrics.
+    Each word is measured once per font; line widths and heights are derived from the
+    cached advances and ink boxes instead of re-measuring the growing line.
     """
-    if not text:
-        return [""]
 
-    words = text.split(' ')
+    def __init__(self, max_words_per_font=TEXT_METRICS_MAX_WORDS_PER_FONT):
+        self.max_words_per_font = max_words_per_font
+        self._word_metrics = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _metrics_for_font(self, font):
+        with self._lock:
+            metrics = self._word_metrics.get(font)
+            if metrics is None or len(metrics) > self.max_words_per_font:
+                metrics = {}
+                self._word_metrics[font] = metrics
+            return metrics
+
+    def _word(self, font, metrics, word):
+        """Returns (advance, box) for word, where box is its ink box or None if it draws nothing."""
+        word_metrics = metrics.get(word)
+        if word_metrics is None:
+            box = font.getbbox(word) if word else None
+            word_metrics = (font.getlength(word), box)
+            metrics[word] = word_metrics
+        return word_metrics
+
+    @staticmethod
+    def _extend_box(line_box, word_box, offset):
+        """Returns line_box grown to cover word_box drawn at horizontal offset."""
+        if word_box is None:
+            return line_box
+        left, top, right, bottom = word_box
+        if line_box is None:
+            return (offset + left, top, offset + right, bottom)
+        return (min(line_box[0], offset + left), min(line_box[1], top),
+                max(line_box[2], offset + right), max(line_box[3], bottom))
+
+    @staticmethod
+    def _line(text, line_box):
+        if line_box is None:
+            return TextLine(text, 0, 0)
+        return TextLine(text, round(line_box[2] - line_box[0]), line_box[3] - line_box[1])
+
+    def _layout_words(self, font, metrics, words):
+        """Returns the ink box of words laid out on one line, as ImageDraw.textbbox would."""
+        space_advance, space_box = self._word(font, metrics, ' ')
+        offset = 0.0
+        line_box = None
+        for index, word in enumerate(words):
+            if index:
+                line_box = self._extend_box(line_box, space_box, offset)
+                offset += space_advance
+            advance, word_box = self._word(font, metrics, word)
+            line_box = self._extend_box(line_box, word_box, offset)
+            offset += advance
+        return line_box
+
+    def measure(self, text, font):
+        """Returns a TextLine for text laid out on a single line."""
+        metrics = self._metrics_for_font(font)
+        return self._line(text, self._layout_words(font, metrics, text.split(' ')))
+
+    def wrap(self, text, font, max_width_pixels, max_words=None, max_lines=None):
+        """
+        Wraps text to fit within max_width_pixels, optionally truncating to max_words words
+        and max_lines lines (an ellipsis marks either truncation). Returns a list of TextLine.
+        """
+        if not text:
+            return [TextLine("", 0, 0)]
 
-    original_text_length = len(words)
-    if max_words is not None and original_text_length > max_words:
-        words = words[:max_words]
-        text_to_wrap = ' '.join(words) + "..."
-    else:
-        text_to_wrap = ' '.join(words)
+        words = text.split(' ')
+        if max_words is not None and len(words) > max_words:
+            words = words[:max_words]
+            words[-1] += "..."
 
-    lines = []
-    current_line_words = []
+        metrics = self._metrics_for_font(font)
+        space_advance, space_box = self._word(font, metrics, ' ')
 
-    dummy_img = Image.new('RGB', (1,1))
-    dummy_draw = ImageDraw.Draw(dummy_img)
+        lines = []
+        current_words = []
+        offset = 0.0
+        line_box = None
 
-    for word in text_to_wrap.split(' '):
-        test_line = ' '.join(current_line_words + [word])
+        for word in words:
+            advance, word_box = self._word(font, metrics, word)
 
-        text_bbox = dummy_draw.textbbox((0,0), test_line, font=font)
-        text_width = text_bbox[2] - text_bbox[0]
+            if current_words:
+                candidate_box = self._extend_box(self._extend_box(line_box, space_box, offset),
+                                                 word_box, offset + space_advance)
+                candidate_width = 0 if candidate_box is None else round(candidate_box[2] - candidate_box[0])
+                if candidate_width <= max_width_pixels:
+                    current_words.append(word)
+                    line_box = candidate_box
+                    offset += space_advance + advance
+                    continue
+                lines.append(self._line(' '.join(current_words), line_box))
 
-        if text_width <= max_width_pixels:
-            current_line_words.append(word)
-        else:
-            if current_line_words:
-                lines.append(' '.join(current_line_words))
-            current_line_words = [word]
+            current_words = [word]
+            line_box = self._extend_box(None, word_box, 0.0)
+            offset = advance
+
+        if current_words:
+            lines.append(self._line(' '.join(current_words), line_box))
+
+        if max_lines is not None and len(lines) > max_lines:
+            lines = lines[:max_lines]
+            last_text = lines[-1].text.strip() + "..."
+            lines[-1] = self._line(last_text, self._layout_words(font, metrics, last_text.split(' ')))
 
-    if current_line_words:
-        lines.append(' '.join(current_line_words))
+        return lines
 
-    return lines
+
+text_layout_engine = TextLayoutEngine()
+
+
+def wrap_text_by_word_count(text, font, max_width_pixels, max_words=None):
+    """
+    Wraps text to fit within a given pixel width and optionally truncates by word count,
+    returning a list of lines.
+    """
+    return [line.text for line in text_layout_engine.wrap(text, font, max_width_pixels, max_words=max_words)]
 
 # --- Background Generator ---
 class BackgroundGenerator:
     """Generates the gradient background for the post."""
-    def generate_gradient_background(self, width, height, color1, color2):
-        """Creates a diagonal gradient image."""
-        img = Image.new('RGBA', (width, height), color1)
-        draw = ImageDraw.Draw(img)
 
-        for y in range(height):
-            r1, g1, b1, a1 = color1
-            r2, g2, b2, a2 = color2
+    # Shared across instances: overlay_text() builds a new generator for every post.
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
 
-            ratio_y = y / height
-
-            r = int(r1 + (r2 - r1) * ratio_y)
-            g = int(g1 + (g2 - g1) * ratio_y)
-            b = int(b1 + (b2 - b1) * ratio_y)
-            a = int(a1 + (a2 - a1) * ratio_y)
+    def generate_gradient_background(self, width, height, color1, color2, direction=BACKGROUND_GRADIENT_DIRECTION):
+        """
+        Creates a gradient image from color1 to color2, either 'vertical' (top to bottom)
+        or 'diagonal' (top-left to bottom-right). Rendered gradients are cached by
+        (size, colors, direction), so repeat calls only pay for a copy.
+        """
+        key = (width, height, tuple(color1), tuple(color2), direction)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached.copy()
+
+        if direction == 'diagonal':
+            img = self._render_diagonal(width, height, color1, color2)
+        else:
+            img = self._render_vertical(width, height, color1, color2)
+
+        with self._cache_lock:
+            self._cache[key] = img
+            while len(self._cache) > GRADIENT_CACHE_MAX_ENTRIES:
+                self._cache.popitem(last=False)
+        return img.copy()
+
+    def _render_vertical(self, width, height, color1, color2):
+        """Maps a vertical ramp through one lookup table per channel and stretches the column across the canvas."""
+        ramp = Image.linear_gradient('L').resize((1, height), Image.Resampling.BILINEAR)
+        bands = [ramp.point([int(c1 + (c2 - c1) * value / 255) for value in range(256)]) for c1, c2 in zip(color1, color2)]
+        return Image.merge('RGBA', bands).resize((width, height), Image.Resampling.NEAREST)
+
+    def _render_diagonal(self, width, height, color1, color2):
+        """Blends the two colors through a mask whose value is the mean of the x and y ramps."""
+        ramp = Image.linear_gradient('L')
+        vertical_ramp = ramp.resize((width, height), Image.Resampling.BILINEAR)
+        horizontal_ramp = ramp.transpose(Image.Transpose.TRANSPOSE).resize((width, height), Image.Resampling.BILINEAR)
+        mask = ImageChops.add(vertical_ramp, horizontal_ramp, scale=2.0)
+        return Image.composite(Image.new('RGBA', (width, height), tuple(color2)),
+                               Image.new('RGBA', (width, height), tuple(color1)), mask)
+
+
+# --- Template Layers ---
+NEWS_CATEGORY_HEADERS = {
+    'startup_news': "STARTUP INSIGHTS",
+    'business_news': "BUSINESS PULSE",
+    'financial_news': "FINANCIAL FOCUS",
+    'entrepreneurial_news': "ENTREPRENEUR VISION",
+}
+
+
+class TemplateLayerCache:
+    """
+    Builds the static layers of each post layout once per content type and canvas size:
+    gradient background, category header, logo and border. overlay_text() copies the
+    cached template and only draws the per-post elements on top.
+    """
 
-            draw.line([(0, y), (width, y)], fill=(r, g, b, a))
+    def __init__(self):
+        self._templates = {}
+        self._logos = {}
+        self._lock = threading.Lock()
 
-        return img
+    def _draw_border(self, canvas):
+        width, height = canvas.size
+        border_rect = [(BORDER_THICKNESS // 2, BORDER_THICKNESS // 2),
+                       (width - BORDER_THICKNESS // 2, height - BORDER_THICKNESS // 2)]
+        ImageDraw.Draw(canvas).rectangle(border_rect, outline=BORDER_COLOR, width=BORDER_THICKNESS)
 
+    def get_logo(self, max_width, max_height):
+        """
+        Returns the logo thumbnailed to fit (max_width, max_height), loaded from LOGO_PATH once.
+        Returns (logo_image, None) on success or (None, exception) if the logo cannot be loaded.
+        """
+        key = (max_width, max_height)
+        with self._lock:
+            if key in self._logos:
+                return self._logos[key]
+        try:
+            logo_image = Image.open(LOGO_PATH).convert("RGBA")
+            logo_image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+            result = (logo_image, None)
+        except Exception as e:
+            result = (None, e)
+        with self._lock:
+            self._logos[key] = result
+        return result
+
+    def paste_news_logo(self, canvas, logo_y):
+        """Pastes the news logo at logo_y, falling back to a text mark if the logo is unavailable."""
+        logo_image, error = self.get_logo(LOGO_WIDTH, LOGO_HEIGHT)
+        if logo_image is not None:
+            canvas.paste(logo_image, (LEFT_PADDING, int(logo_y)), logo_image)
+            return
+        if isinstance(error, FileNotFoundError):
+            print(f"Warning: Logo file not found at {LOGO_PATH}. Embedding text fallback.")
+            fallback_text = "Insight Pulse"
+        else:
+            print(f"Error embedding logo: {error}. Embedding text fallback.")
+            fallback_text = "Insight Pulse (Error)"
+        ImageDraw.Draw(canvas).text((LEFT_PADDING, int(logo_y) + (LOGO_HEIGHT - 30) // 2), fallback_text,
+                                    font=load_font(FONT_PATH_BOLD, 30), fill=COLOR_SOURCE_TEXT)
+
+    def _get(self, key, builder):
+        with self._lock:
+            template = self._templates.get(key)
+        if template is None:
+            template = builder()
+            with self._lock:
+                self._templates[key] = template
+        return template.copy()
+
+    def get_news_template(self, content_type, width=CANVAS_WIDTH, height=CANVAS_HEIGHT, include_logo=True):
+        """Returns a copy of the news template for content_type; the logo sits at its default position."""
+        header_text = NEWS_CATEGORY_HEADERS.get(content_type, "INSIGHT PULSE")
+
+        def build():
+            canvas = BackgroundGenerator().generate_gradient_background(width, height,
+                                                                       COLOR_GRADIENT_TOP_LEFT, COLOR_GRADIENT_BOTTOM_RIGHT)
+            font_top_left_text = load_font(FONT_PATH_ALFA_SLAB_ONE, FONT_SIZE_TOP_LEFT_TEXT)
+            ImageDraw.Draw(canvas).text((TOP_LEFT_TEXT_POS_X, TOP_LEFT_TEXT_POS_Y), header_text,
+                                        font=font_top_left_text, fill=COLOR_TOP_LEFT_TEXT)
+            if include_logo:
+                self.paste_news_logo(canvas, self.default_news_logo_y(height))
+            self._draw_border(canvas)
+            return canvas
+
+        return self._get(('news', header_text, width, height, include_logo), build)
+
+    def get_quote_template(self, width=CANVAS_WIDTH, height=CANVAS_HEIGHT):
+        """Returns a copy of the motivational quote template (background, logo and border)."""
+
+        def build():
+            canvas = BackgroundGenerator().generate_gradient_background(width, height,
+                                                                       QUOTE_COLOR_BACKGROUND_LIGHT,
+                                                                       tuple(int(c * 0.9) for c in QUOTE_COLOR_BACKGROUND_LIGHT[:3]) + (255,))
+            logo_image, error = self.get_logo(QUOTE_LOGO_WIDTH, QUOTE_LOGO_HEIGHT)
+            if logo_image is not None:
+                logo_x = (width - QUOTE_LOGO_WIDTH) // 2
+                logo_y = height - QUOTE_LOGO_BOTTOM_MARGIN - QUOTE_LOGO_HEIGHT
+                canvas.paste(logo_image, (logo_x, logo_y), logo_image)
+            elif isinstance(error, FileNotFoundError):
+                print(f"Warning: Logo file not found at {LOGO_PATH}. Skipping logo for quote post.")
+            else:
+                print(f"Error embedding logo for quote post: {error}. Skipping logo for quote post.")
+            self._draw_border(canvas)
+            return canvas
 
-# --- API Callers ---
+        return self._get(('quote', width, height), build)
 
-class NewsFetcher:
-    """Fetches news from various RSS feeds."""
+    @staticmethod
+    def default_news_logo_y(height=CANVAS_HEIGHT):
+        return height - BOTTOM_PADDING - LOGO_HEIGHT - LOGO_BOTTOM_MARGIN
 
-    def _fetch_from_rss(self, rss_url, article_count=1, time_window_hours=72):
-        """Fetches and parses articles from an RSS feed, filtering by recency."""
-        try:
-            feed = feedparser.parse(rss_url)
-            if feed.bozo:
-                print(f"Warning: RSS feed parsing issues for {rss_url}: {feed.bozo_exception}")
+    def redraw_border(self, canvas):
+        """Redraws the border after per-post layers that may have been drawn over it."""
+        self._draw_border(canvas)
 
-            recent_articles = []
-            time_threshold = datetime.now(UTC) - timedelta(hours=time_window_hours)
 
-            for entry in feed.entries:
-                published_dt_candidate = None
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                    published_dt_candidate = datetime(*entry.published_parsed[:6], tzinfo=UTC)
-                elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
-                    published_dt_candidate = datetime(*entry.updated_parsed[:6], tzinfo=UTC)
-                
-                if published_dt_candidate is None:
-                    published_dt_candidate = datetime.now(UTC)
+template_layer_cache = TemplateLayerCache()
 
-                if published_dt_candidate > time_threshold:
-                    raw_description = entry.summary if hasattr(entry, 'summary') and entry.summary else (entry.title if hasattr(entry, 'title') else 'No Description')
-                    clean_description = re.sub(r'<[^>]+>', '', raw_description).strip()
-                    clean_description = re.sub(r'\s+', ' ', clean_description).strip()
 
-                    recent_articles.append({
-                        'title': entry.title if hasattr(entry, 'title') and entry.title else 'No Title',
-                        'description': clean_description,
-                        'url': entry.link if hasattr(entry, 'link') else rss_url,
-                        'source': feed.feed.title if hasattr(feed.feed, 'title') and feed.feed.title else 'Unknown RSS',
-                        'publishedAt': published_dt_candidate.isoformat()
-                    })
-                    if len(recent_articles) >= article_count:
-                        break
+class CardEffects:
+    """
+    Drop shadow and rounded-corner mask for the photo card. Both depend only on the card
+    geometry, so they are rendered (including the Gaussian blur) once per geometry and reused.
+    """
 
-            return recent_articles
+    def __init__(self):
+        self._layers = {}
+        self._lock = threading.Lock()
+
+    def get_layers(self, width, height, radius, shadow_offset=IMAGE_SHADOW_OFFSET,
+                   blur_radius=IMAGE_SHADOW_BLUR_RADIUS, shadow_color=IMAGE_SHADOW_COLOR):
+        """Returns (shadow_rgba, mask_l) for a width x height card with rounded corners."""
+        key = (width, height, radius, shadow_offset, blur_radius, tuple(shadow_color))
+        with self._lock:
+            layers = self._layers.get(key)
+        if layers is not None:
+            return layers
+
+        shadow_img = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        ImageDraw.Draw(shadow_img).rounded_rectangle(
+            (shadow_offset, shadow_offset, width + shadow_offset, height + shadow_offset),
+            radius=radius, fill=tuple(shadow_color)
+        )
+        shadow_img = shadow_img.filter(ImageFilter.GaussianBlur(radius=blur_radius))
 
-        except Exception as e:
-            print(f"Error fetching from RSS feed {rss_url}: {e}")
-            return []
+        mask = Image.new('L', (width, height), 0)
+        ImageDraw.Draw(mask).rounded_rectangle((0, 0, width, height), radius=radius, fill=255)
 
+        layers = (shadow_img, mask)
+        with self._lock:
+            self._layers[key] = layers
+        return layers
 
-    def get_single_content_item(self, content_type: str):
+    def composite_card(self, canvas, photo, position, radius=IMAGE_ROUND_RADIUS):
         """
-        Fetches a single content item based on the specified type, using only RSS feeds.
-        Returns None if no recent, relevant content can be found.
+        Pastes photo onto canvas at position as a rounded card with a drop shadow.
+        The photo is masked onto a copy of the cached shadow, and the combined card is
+        pasted onto the canvas in a single pass.
         """
-        if content_type == 'motivational_quote_post':
-            return None
+        shadow_img, mask = self.get_layers(photo.width, photo.height, radius)
+        card = shadow_img.copy()
+        card.paste(photo, (0, 0), mask)
+        canvas.paste(card, position, card)
 
-        startup_news_sources = [
+
+card_effects = CardEffects()
+
+
+# --- API Callers ---
+
+class NewsFetcher:
+    """Fetches news from various RSS feeds."""
+
+    NEWS_SOURCES = {
+        'startup_news': [
             {'type': 'rss', 'url': 'https://techcrunch.com/category/startups/feed/', 'name': 'TechCrunch Startups'},
             {'type': 'rss', 'url': 'https://feeds.feedburner.com/Forbes/Innovation', 'name': 'Forbes Innovation'},
             {'type': 'rss', 'url': 'https://www.inc.com/feed.xml', 'name': 'Inc. Magazine'},
@@ -209,9 +525,8 @@ class NewsFetcher:
             {'type': 'rss', 'url': 'https://sifted.eu/feed/', 'name': 'Sifted EU Startups'},
             {'type': 'rss', 'url': 'https://www.startupgrind.com/blog/rss/', 'name': 'Startup Grind Blog'},
             {'type': 'rss', 'url': 'https://venturebeat.com/category/startup/feed/', 'name': 'VentureBeat Startup'},
-        ]
-
-        business_news_sources = [
+        ],
+        'business_news': [
             {'type': 'rss', 'url': 'https://www.reuters.com/business/rss', 'name': 'Reuters Business News'},
             {'type': 'rss', 'url': 'https://www.wsj.com/xml/rss/SHELF/Public.xml', 'name': 'Wall Street Journal Business'},
             {'type': 'rss', 'url': 'https://www.cnbc.com/id/10001147/device/rss/rss.html', 'name': 'CNBC Business News'},
@@ -220,9 +535,8 @@ class NewsFetcher:
             {'type': 'rss', 'url': 'https://www.ft.com/rss/companies', 'name': 'Financial Times Companies'},
             {'type': 'rss', 'url': 'https://www.businessinsider.com/feed', 'name': 'Business Insider'},
             {'type': 'rss', 'url': 'https://www.theguardian.com/business/rss', 'name': 'The Guardian Business'},
-        ]
-
-        financial_news_sources = [
+        ],
+        'financial_news': [
             {'type': 'rss', 'url': 'https://www.reuters.com/markets/rss', 'name': 'Reuters Markets News'},
             {'type': 'rss', 'url': 'https://feeds.a.dj.com/rss/RssCommon.xml', 'name': 'Dow Jones News (Financial)'},
             {'type': 'rss', 'url': 'https://www.ft.com/rss/markets', 'name': 'Financial Times Markets'},
@@ -231,9 +545,8 @@ class NewsFetcher:
             {'type': 'rss', 'url': 'https://seekingalpha.com/feed.xml', 'name': 'Seeking Alpha'},
             {'type': 'rss', 'url': 'https://www.marketwatch.com/rss/marketwatch/topstories.xml', 'name': 'MarketWatch Top Stories'},
             {'type': 'rss', 'url': 'https://www.investopedia.com/feed.rss', 'name': 'Investopedia'},
-        ]
-
-        entrepreneurial_news_sources = [
+        ],
+        'entrepreneurial_news': [
             {'type': 'rss', 'url': 'https://www.entrepreneur.com/latest.rss', 'name': 'Entrepreneur Magazine'},
             {'type': 'rss', 'url': 'https://www.forbes.com/entrepreneurs/feed/', 'name': 'Forbes Entrepreneurs'},
             {'type': 'rss', 'url': 'https://www.inc.com/feed.xml', 'name': 'Inc. Magazine (Entrepreneurial)'},
@@ -242,30 +555,211 @@ class NewsFetcher:
             {'type': 'rss', 'url': 'https://www.startups.co.uk/feed/', 'name': 'Startups.co.uk'},
             {'type': 'rss', 'url': 'https://foundr.com/feed/', 'name': 'Foundr Magazine'},
             {'type': 'rss', 'url': 'https://www.ycombinator.com/blog/rss', 'name': 'Y Combinator Blog'},
-        ]
+        ],
+    }
+
+    def __init__(self, feed_cache=None, seen_index=None, feed_health=None, candidate_pool=None, http_sessions=None):
+        self.http = http_sessions if http_sessions is not None else HTTPSessionFactory()
+        self.feed_cache = feed_cache if feed_cache is not None else FeedCache()
+        self.seen_index = seen_index if seen_index is not None else SeenArticleIndex()
+        self.feed_health = feed_health if feed_health is not None else FeedHealthTracker()
+        self.candidate_pool = candidate_pool if candidate_pool is not None else CandidatePool()
+        # Some feeds are listed under several categories; their articles are pooled for all of them.
+        self.feed_categories = {}
+        for category, sources in self.NEWS_SOURCES.items():
+            for source_info in sources:
+                self.feed_categories.setdefault(source_info['url'], []).append(category)
+        self.feed_latencies = {} # rss_url -> seconds spent downloading and parsing, for this process
+        self._latency_lock = threading.Lock()
+
+    def _normalize_entry(self, entry, rss_url):
+        """Reduces a feedparser entry to the JSON-serializable fields the pipeline uses."""
+        published = None
+        if hasattr(entry, 'published_parsed') and entry.published_parsed:
+            published = datetime(*entry.published_parsed[:6], tzinfo=UTC).isoformat()
+        elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
+            published = datetime(*entry.updated_parsed[:6], tzinfo=UTC).isoformat()
+
+        raw_description = entry.summary if hasattr(entry, 'summary') and entry.summary else (entry.title if hasattr(entry, 'title') else 'No Description')
+        clean_description = re.sub(r'<[^>]+>', '', raw_description).strip()
+        clean_description = re.sub(r'\s+', ' ', clean_description).strip()
+
+        return {
+            'title': entry.title if hasattr(entry, 'title') and entry.title else 'No Title',
+            'description': clean_description,
+            'url': entry.link if hasattr(entry, 'link') else rss_url,
+            'published': published,
+        }
 
-        content_item = None
-        articles = []
-        selected_sources = []
-
-        if content_type == 'startup_news':
-            selected_sources = startup_news_sources
-        elif content_type == 'business_news':
-            selected_sources = business_news_sources
-        elif content_type == 'financial_news':
-            selected_sources = financial_news_sources
-        elif content_type == 'entrepreneurial_news':
-            selected_sources = entrepreneurial_news_sources
-        else:
-            print(f"Unknown content type requested: {content_type}. Please select from valid types.")
-            return None
+    def _download_feed(self, rss_url):
+        """
+        Downloads and parses an RSS feed with a per-feed timeout (feedparser.parse(url) has none).
+        Sends the cached validators so an unchanged feed costs a 304 and no parsing.
+        Returns (feed_title, normalized_entries, bozo_exception_or_None).
+        """
+        headers = {"User-Agent": RSS_USER_AGENT, "Accept-Encoding": ACCEPT_ENCODING}
+        headers.update(self.feed_cache.conditional_headers(rss_url))
+        response = self.http.get(rss_url, headers=headers, timeout=RSS_FEED_TIMEOUT_SECONDS)
+
+        if response.status_code == 304:
+            cached = self.feed_cache.get_not_modified(rss_url)
+            if cached is not None:
+                print(f"RSS feed not modified since last run, using cached entries: {rss_url}")
+                feed_title, entries = cached
+                return feed_title, entries, None
+
+        response.raise_for_status()
+        feed = feedparser.parse(response.content, response_headers=dict(response.headers))
+        feed_title = feed.feed.title if hasattr(feed.feed, 'title') and feed.feed.title else 'Unknown RSS'
+        entries = [self._normalize_entry(entry, rss_url) for entry in feed.entries]
+        self.feed_cache.store(rss_url, response.headers.get('ETag'), response.headers.get('Last-Modified'), feed_title, entries)
+        return feed_title, entries, feed.bozo_exception if feed.bozo else None
+
+    def _record_latency(self, rss_url, seconds):
+        with self._latency_lock:
+            self.feed_latencies[rss_url] = seconds
+
+    def _fetch_from_rss(self, rss_url, article_count=1, time_window_hours=72):
+        """
+        Fetches and parses articles from an RSS feed, filtering by recency.
+        Every fresh, unposted article is added to the candidate pool; the first article_count are returned.
+        """
+        start = time.perf_counter()
+        success, bozo, recent_articles = False, False, []
+        try:
+            feed_title, entries, bozo_exception = self._download_feed(rss_url)
+            success, bozo = True, bool(bozo_exception)
+            if bozo_exception:
+                print(f"Warning: RSS feed parsing issues for {rss_url}: {bozo_exception}")
+
+            recent_articles = []
+            skipped_seen = 0
+            time_threshold = datetime.now(UTC) - timedelta(hours=time_window_hours)
+
+            for entry in entries:
+                if entry.get('published'):
+                    published_dt_candidate = datetime.fromisoformat(entry['published'])
+                else:
+                    published_dt_candidate = datetime.now(UTC)
 
-        random.shuffle(selected_sources)
+                if published_dt_candidate > time_threshold:
+                    if self.seen_index.is_seen(entry['url'], entry['title']):
+                        skipped_seen += 1
+                        continue
+                    recent_articles.append({
+                        'title': entry['title'],
+                        'description': entry['description'],
+                        'url': entry['url'],
+                        'source': feed_title,
+                        'publishedAt': published_dt_candidate.isoformat()
+                    })
+
+            if skipped_seen:
+                print(f"Skipped {skipped_seen} already-posted articles in {rss_url}.")
+            categories = self.feed_categories.get(rss_url, [])
+            for article in recent_articles:
+                self.candidate_pool.add(article, categories)
+            return recent_articles[:article_count]
+
+        except Exception as e:
+            print(f"Error fetching from RSS feed {rss_url}: {e}")
+            return []
+        finally:
+            elapsed = time.perf_counter() - start
+            self._record_latency(rss_url, elapsed)
+            self.feed_health.record(rss_url, elapsed, success, bozo=bozo, fresh=bool(recent_articles))
+
+    def _fetch_sequentially(self, selected_sources, content_type):
+        """Tries each source in turn and returns the articles of the first one that has any."""
         for source_info in selected_sources:
             print(f"Fetching {content_type.replace('_', ' ').title()} from: {source_info['name']} ({source_info['type']})...")
             articles = self._fetch_from_rss(source_info['url'], article_count=1)
             if articles:
-                break
+                return articles
+        return []
+
+    def _fetch_concurrently(self, selected_sources, content_type):
+        """
+        Fetches every source in parallel, bounded by RSS_FETCH_DEADLINE_SECONDS.
+        With RSS_CONCURRENT_STRATEGY 'first', returns the first non-empty result to arrive;
+        with 'all', waits for every feed (or the deadline) and returns the most recent article.
+        """
+        print(f"Fetching {content_type.replace('_', ' ').title()} from {len(selected_sources)} sources concurrently...")
+        collected = []
+        # Slow feeds are abandoned rather than awaited; their own request timeouts bound them.
+        with racing_executor(min(RSS_MAX_WORKERS, len(selected_sources)) or 1) as executor:
+            futures = {executor.submit(self._fetch_from_rss, source_info['url'], 1): source_info
+                       for source_info in selected_sources}
+            try:
+                for future in as_completed(futures, timeout=RSS_FETCH_DEADLINE_SECONDS):
+                    articles = future.result()
+                    if not articles:
+                        continue
+                    print(f"Got {content_type.replace('_', ' ').title()} from: {futures[future]['name']}")
+                    if RSS_CONCURRENT_STRATEGY == 'first':
+                        return articles
+                    collected.extend(articles)
+            except FuturesTimeoutError:
+                print(f"RSS fetch deadline of {RSS_FETCH_DEADLINE_SECONDS}s reached; using results received so far.")
+
+        collected.sort(key=lambda article: article.get('publishedAt', ''), reverse=True)
+        return collected[:1]
+
+    def report_feed_latencies(self):
+        """Prints the per-feed download latency recorded during this process."""
+        with self._latency_lock:
+            latencies = sorted(self.feed_latencies.items(), key=lambda item: item[1])
+        for rss_url, seconds in latencies:
+            print(f"  {seconds * 1000:8.0f} ms  {rss_url}")
+
+
+    def save_state(self):
+        """Persists the feed cache, feed health stats and candidate pool."""
+        self.feed_cache.save()
+        self.feed_health.save()
+        self.candidate_pool.save()
+
+    def get_single_content_item(self, content_type: str):
+        """
+        Fetches a single content item based on the specified type, using only RSS feeds.
+        Serves from the candidate pool and only goes to the network when the category's pool runs low.
+        Returns None if no recent, relevant content can be found.
+        """
+        if content_type == 'motivational_quote_post':
+            return None
+
+        content_item = None
+        articles = []
+        selected_sources = list(self.NEWS_SOURCES.get(content_type, []))
+
+        if not selected_sources:
+            print(f"Unknown content type requested: {content_type}. Please select from valid types.")
+            return None
+
+        self.candidate_pool.prune()
+        pooled_count = self.candidate_pool.count(content_type)
+        if pooled_count >= CANDIDATE_POOL_LOW_WATERMARK:
+            print(f"Serving {content_type.replace('_', ' ').title()} from the candidate pool ({pooled_count} pooled articles).")
+        else:
+            print(f"Candidate pool has {pooled_count} {content_type.replace('_', ' ').title()} articles; refilling from RSS feeds.")
+            active_sources, demoted_sources = self.feed_health.order_sources(selected_sources)
+            if RSS_FETCH_MODE == 'concurrent':
+                # Demoted feeds are only fanned out to when every healthy feed is benched.
+                articles = self._fetch_concurrently(active_sources or demoted_sources, content_type)
+            else:
+                articles = self._fetch_sequentially(active_sources + demoted_sources, content_type)
+
+            print("RSS feed latencies:")
+            self.report_feed_latencies()
+            print("RSS feed health:")
+            self.feed_health.report(selected_sources)
+
+        pooled_article = self.candidate_pool.take(content_type, seen_index=self.seen_index)
+        if pooled_article:
+            articles = [pooled_article]
+        elif articles:
+            self.candidate_pool.discard(articles[0].get('url'))
+        self.save_state()
 
         if articles:
             article = articles[0]
@@ -286,12 +780,26 @@ class NewsFetcher:
         return content_item
 
 
+# Per-provider circuit breakers for stock photo providers, HF endpoints and LLM models.
+circuit_breakers = CircuitBreakerRegistry()
+
+# Shared by every OpenRouter call below, so retries of a post reuse identical completions.
+llm_response_cache = LLMResponseCache(model_chain=ModelChain(breakers=circuit_breakers))
+
+# Keep-alive connection pools shared by every requests-based caller, across worker threads.
+http_sessions = HTTPSessionFactory()
+
+# Fetched and generated news images, reused across runs.
+image_asset_cache = ImageAssetCache()
+
+
 class TextProcessor:
     """Summarizes and enhances text using OpenRouter AI (DeepSeek model) with storytelling."""
 
     def __init__(self):
         self.api_key = OPENROUTER_API_KEY
         self.model = OPENROUTER_MODEL
+        self.models = LLM_TEXT_MODEL_CHAIN # self.model first, then fallbacks
         self.site_url = OPENROUTER_SITE_URL
         self.site_name = OPENROUTER_SITE_NAME
         self.client = OpenAI(
@@ -311,46 +819,64 @@ class TextProcessor:
         ]
 
 
-    def _call_ai_api(self, messages):
+    @staticmethod
+    def _story_fields(parsed_data):
+        """Applies the title and summary word limits to a parsed response. Returns (short_title, summary, chosen_method)."""
+        short_title = parsed_data.get('short_title', "Untitled Story")
+        summary = parsed_data.get('summary_text', "No captivating story available.")
+        chosen_method = parsed_data.get('storytelling_method', "Unknown")
+
+        title_words = short_title.split()
+        short_title = ' '.join(title_words[:TITLE_MAX_WORDS]) if len(title_words) > TITLE_MAX_WORDS else short_title
+
+        summary_words = summary.split()
+        if len(summary_words) > SUMMARY_MAX_WORDS:
+            summary = ' '.join(summary_words[:SUMMARY_MAX_WORDS]) + "..."
+
+        return short_title, summary, chosen_method
+
+    @staticmethod
+    def _stream_spec(required_keys, on_title=None):
+        """
+        Streaming requirements for a storytelling response: stop once required_keys are in (the summary
+        may be cut at SUMMARY_MAX_WORDS) and hand the headline to on_title as soon as it is complete.
+        """
+        def on_field(key, value):
+            if key == 'short_title' and on_title is not None and isinstance(value, str):
+                on_title(' '.join(value.split()[:TITLE_MAX_WORDS]))
+        return StreamSpec(required_keys, word_limits={'summary_text': SUMMARY_MAX_WORDS}, on_field=on_field)
+
+    def _call_ai_api(self, messages, on_title=None):
         """Helper to call the OpenRouter API using the OpenAI client. Returns (short_title, summary, chosen_method, success_flag)."""
         if not self.api_key or self.api_key == "sk-or-v1-YOUR_DEEPSEEK_CHAT_API_KEY_HERE":
             print("OPENROUTER_API_KEY for Deepseek Chat is not set or is a placeholder. Skipping AI text processing.")
             return "AI Key Error", "Please set your OpenRouter API key in config.py.", "None", False
 
         try:
-            completion = self.client.chat.completions.create(
+            ai_content_str = llm_response_cache.complete(
+                self.client,
                 extra_headers={
                     "HTTP-Referer": self.site_url,
                     "X-Title": self.site_name,
                 },
-                model=self.model,
+                model=self.models,
                 messages=messages,
                 temperature=0.8,
                 max_tokens=600,
-                response_format={"type": "json_object"}
+                response_format={"type": "json_object"},
+                stream=self._stream_spec(('short_title', 'storytelling_method', 'summary_text'), on_title)
             )
 
-            if completion.choices and completion.choices[0].message and completion.choices[0].message.content:
-                ai_content_str = completion.choices[0].message.content
+            if ai_content_str:
                 try:
                     parsed_data = json.loads(ai_content_str)
-                    short_title = parsed_data.get('short_title', "Untitled Story")
-                    summary = parsed_data.get('summary_text', "No captivating story available.")
-                    chosen_method = parsed_data.get('storytelling_method', "Unknown")
-
-                    title_words = short_title.split()
-                    short_title = ' '.join(title_words[:TITLE_MAX_WORDS]) if len(title_words) > TITLE_MAX_WORDS else short_title
-
-                    summary_words = summary.split()
-                    if len(summary_words) > SUMMARY_MAX_WORDS:
-                        summary = ' '.join(summary_words[:SUMMARY_MAX_WORDS]) + "..."
-
+                    short_title, summary, chosen_method = self._story_fields(parsed_data)
                     return short_title, summary, chosen_method, True
                 except json.JSONDecodeError:
                     print(f"Warning: OpenRouter (Deepseek Chat) did not return valid JSON. Raw response: {ai_content_str[:200]}...")
                     return "AI Storytelling Error", "AI summary generation failed. Check API response.", "JSON Error", False
 
-            print(f"OpenRouter (Deepseek Chat) response missing expected content: {completion}")
+            print("OpenRouter (Deepseek Chat) response missing expected content.")
             return "AI Response Error", "AI response structure invalid.", "Empty Response", False
 
         except Exception as e:
@@ -358,13 +884,8 @@ class TextProcessor:
             return "API Error", f"AI API request failed: {e}", "API Call Failed", False
 
 
-    def process_text(self, title, description, post_type, style_recommendations=""):
-        """Generates concise title and summary for a given post using OpenRouter AI (Deepseek),
-        focusing on storytelling elements. Returns (short_title, summary, chosen_method, success_flag).
-        """
-        if post_type == 'motivational_quote_post':
-            return None, None, "N/A", False
-
+    def _build_messages(self, title, description, post_type, style_recommendations="", with_caption=False):
+        """Builds the storytelling prompt; with_caption also asks for the Instagram caption and hashtags."""
         method_list_str = "\n".join([f"- {m}" for m in self.storytelling_methods])
 
         system_message_content = f"""
@@ -384,6 +905,17 @@ class TextProcessor:
         Adhere strictly to the word and line count constraints. The output MUST always be a valid JSON object.
         Consider the following style recommendations from past performance analysis when crafting the content: {style_recommendations}
         """
+        # summary_text goes last so a summary running over SUMMARY_MAX_WORDS can be cut off while streaming
+        output_keys = 'three keys, in this order: "short_title", "storytelling_method", and "summary_text"'
+        example_extra = ''
+        if with_caption:
+            system_message_content += """
+        In the same response, also write the Instagram caption and exactly 10 trending, relevant hashtags for the post.
+        The caption should be evocative, encourage engagement, and align with the chosen storytelling method.
+        """
+            output_keys = ('five keys, in this order: "short_title", "storytelling_method", '
+                           '"caption" (string), "hashtags" (array of exactly 10 strings), and "summary_text"')
+            example_extra = '\n          "caption": "Example caption...",\n          "hashtags": ["#example", "#trending"],'
 
         user_message_content = f"""
         Generate a compelling headline and a detailed summary for the following content, using one of the specified storytelling methods.
@@ -398,21 +930,31 @@ class TextProcessor:
         Original Title: {title}
         Original Description: {description}
 
-        Return ONLY the JSON object with three keys: "short_title", "summary_text", and "storytelling_method".
+        Return ONLY the JSON object with {output_keys}.
         Example Output:
         {{
           "short_title": "The Silent Revolution Reshaping Finance?",
-          "summary_text": "A new decentralized finance (DeFi) protocol is quietly gaining traction, promising to disrupt traditional banking with its transparent and automated lending systems. This innovative approach could bypass intermediaries entirely, offering unprecedented access to capital for small businesses and individuals. Is this the future, or just another fleeting trend? Only time will tell.",
-          "storytelling_method": "The Burning Question"
+          "storytelling_method": "The Burning Question",{example_extra}
+          "summary_text": "A new decentralized finance (DeFi) protocol is quietly gaining traction, promising to disrupt traditional banking with its transparent and automated lending systems. This innovative approach could bypass intermediaries entirely, offering unprecedented access to capital for small businesses and individuals. Is this the future, or just another fleeting trend? Only time will tell."
         }}
         """
 
-        messages = [
+        return [
             {"role": "system", "content": system_message_content},
             {"role": "user", "content": user_message_content}
         ]
 
-        short_title, summary, chosen_method, success = self._call_ai_api(messages)
+    def process_text(self, title, description, post_type, style_recommendations="", on_title=None):
+        """Generates concise title and summary for a given post using OpenRouter AI (Deepseek),
+        focusing on storytelling elements. Returns (short_title, summary, chosen_method, success_flag).
+        on_title(short_title) is called as soon as the headline is known, before the summary is finished.
+        """
+        if post_type == 'motivational_quote_post':
+            return None, None, "N/A", False
+
+        messages = self._build_messages(title, description, post_type, style_recommendations)
+
+        short_title, summary, chosen_method, success = self._call_ai_api(messages, on_title)
 
         if not success:
             print("AI text processing failed. Using truncated original description as fallback for summary.")
@@ -426,6 +968,56 @@ class TextProcessor:
 
         return short_title, summary, chosen_method, True
 
+    def generate_post_bundle(self, title, description, post_type, style_recommendations="", on_title=None):
+        """
+        Single structured-JSON call that returns the headline, summary, storytelling method, caption and
+        hashtags together, instead of a DeepSeek call followed by a Mistral call.
+        Returns a dict with short_title, summary, storytelling_method, caption and hashtags, or None so the
+        caller can fall back to process_text() and CaptionGenerator.
+        """
+        if post_type == 'motivational_quote_post':
+            return None
+        if not self.api_key or self.api_key == "sk-or-v1-YOUR_DEEPSEEK_CHAT_API_KEY_HERE":
+            print("OPENROUTER_API_KEY for Deepseek Chat is not set or is a placeholder. Skipping post bundle generation.")
+            return None
+
+        messages = self._build_messages(title, description, post_type, style_recommendations, with_caption=True)
+        try:
+            ai_content_str = llm_response_cache.complete(
+                self.client,
+                extra_headers={
+                    "HTTP-Referer": self.site_url,
+                    "X-Title": self.site_name,
+                },
+                model=self.models,
+                messages=messages,
+                temperature=0.8,
+                max_tokens=900,
+                response_format={"type": "json_object"},
+                stream=self._stream_spec(('short_title', 'storytelling_method', 'caption', 'hashtags', 'summary_text'), on_title)
+            )
+            parsed_data = json.loads(ai_content_str) if ai_content_str else None
+        except json.JSONDecodeError:
+            print(f"Warning: OpenRouter (Deepseek Chat) did not return valid JSON for the post bundle. Raw response: {ai_content_str[:200]}...")
+            return None
+        except Exception as e:
+            print(f"Error calling OpenRouter (Deepseek Chat) API for the post bundle: {e}")
+            return None
+
+        required_keys = ('short_title', 'summary_text', 'caption')
+        if not isinstance(parsed_data, dict) or not all(isinstance(parsed_data.get(key), str) and parsed_data.get(key).strip() for key in required_keys):
+            print("OpenRouter (Deepseek Chat) post bundle is missing expected fields.")
+            return None
+
+        short_title, summary, chosen_method = self._story_fields(parsed_data)
+        return {
+            'short_title': short_title,
+            'summary': summary,
+            'storytelling_method': chosen_method,
+            'caption': parsed_data['caption'],
+            'hashtags': CaptionGenerator.normalize_hashtags(parsed_data.get('hashtags', [])),
+        }
+
 
 class CaptionGenerator:
     """Generates Instagram captions and hashtags using OpenRouter AI (Mistral model)."""
@@ -433,6 +1025,7 @@ class CaptionGenerator:
     def __init__(self):
         self.api_key = OPENROUTER_MISTRAL_API_KEY
         self.model = OPENROUTER_MISTRAL_MODEL
+        self.models = LLM_CAPTION_MODEL_CHAIN # self.model first, then fallbacks
         self.site_url = OPENROUTER_SITE_URL
         self.site_name = OPENROUTER_SITE_NAME
         self.client = OpenAI(
@@ -440,6 +1033,29 @@ class CaptionGenerator:
             api_key=self.api_key,
         )
 
+    @staticmethod
+    def normalize_hashtags(hashtags):
+        """Validates an AI hashtag list, trims or pads it to exactly 10 and makes sure every tag starts with '#'."""
+        if not isinstance(hashtags, list) or not all(isinstance(h, str) for h in hashtags):
+            hashtags = ["#news", "#update"]
+
+        if len(hashtags) > 10:
+            hashtags = hashtags[:10]
+        elif len(hashtags) < 10:
+            generic_hashtags = ["#dailynews", "#breaking", "#insightpulse", "#info", "#currentaffairs",
+                                "#innovation", "#businessinsights", "#financefacts", "#startupjourney",
+                                "#entrepreneurmindset", "#successstories", "#marketupdate", "#investing",
+                                "#businesstips", "#futureofwork"]
+            current_tags_lower = {h.lower() for h in hashtags}
+            for gen_tag in generic_hashtags:
+                if len(hashtags) >= 10:
+                    break
+                if gen_tag.lower() not in current_tags_lower:
+                    hashtags.append(gen_tag)
+                    current_tags_lower.add(gen_tag.lower())
+
+        return [h if h.startswith('#') else f'#{h}' for h in hashtags]
+
     def generate_caption_and_hashtags(self, short_title, summary, storytelling_method, post_type, style_recommendations=""):
         """
         Generates an Instagram-style caption and 10 relevant hashtags.
@@ -492,50 +1108,31 @@ class CaptionGenerator:
         ]
 
         try:
-            completion = self.client.chat.completions.create(
+            ai_content_str = llm_response_cache.complete(
+                self.client,
                 extra_headers={
                     "HTTP-Referer": self.site_url,
                     "X-Title": self.site_name,
                 },
-                model=self.model,
+                model=self.models,
                 messages=messages,
                 temperature=0.7,
                 max_tokens=250,
-                response_format={"type": "json_object"}
+                response_format={"type": "json_object"},
+                stream=StreamSpec(('caption', 'hashtags'))
             )
 
-            if completion.choices and completion.choices[0].message and completion.choices[0].message.content:
-                ai_content_str = completion.choices[0].message.content
+            if ai_content_str:
                 try:
                     parsed_data = json.loads(ai_content_str)
                     caption = parsed_data.get('caption', "Engaging caption from Mistral.")
-                    hashtags = parsed_data.get('hashtags', [])
-                    if not isinstance(hashtags, list) or not all(isinstance(h, str) for h in hashtags):
-                        hashtags = ["#news", "#update"]
-
-                    if len(hashtags) > 10:
-                        hashtags = hashtags[:10]
-                    elif len(hashtags) < 10:
-                        generic_hashtags = ["#dailynews", "#breaking", "#insightpulse", "#info", "#currentaffairs",
-                                            "#innovation", "#businessinsights", "#financefacts", "#startupjourney",
-                                            "#entrepreneurmindset", "#successstories", "#marketupdate", "#investing",
-                                            "#businesstips", "#futureofwork"]
-                        current_tags_lower = {h.lower() for h in hashtags}
-                        for gen_tag in generic_hashtags:
-                            if len(hashtags) >= 10:
-                                break
-                            if gen_tag.lower() not in current_tags_lower:
-                                hashtags.append(gen_tag)
-                                current_tags_lower.add(gen_tag.lower())
-
-                    hashtags = [h if h.startswith('#') else f'#{h}' for h in hashtags]
-
+                    hashtags = self.normalize_hashtags(parsed_data.get('hashtags', []))
                     return caption, hashtags, True
                 except json.JSONDecodeError:
                     print(f"Warning: Mistral did not return valid JSON for caption/hashtags. Raw: {ai_content_str[:200]}...")
                     return "Caption generation failed due to invalid JSON from AI.", ["#error", "#news"], False
 
-            print(f"Mistral response missing expected content for caption/hashtags: {completion}")
+            print("Mistral response missing expected content for caption/hashtags.")
             return "Caption generation failed: AI response structure invalid.", ["#error", "#news"], False
 
         except Exception as e:
@@ -547,7 +1144,11 @@ class CaptionGenerator:
 class ImageGenerator:
     """Generates an image using Hugging Face Inference APIs."""
 
-    def __init__(self, token, endpoints):
+    def __init__(self, token, endpoints, http_sessions=None, endpoint_stats=None, asset_cache=None, breakers=None):
+        self.http = http_sessions if http_sessions is not None else HTTPSessionFactory()
+        self.breakers = breakers if breakers is not None else CircuitBreakerRegistry()
+        self.endpoint_stats = endpoint_stats if endpoint_stats is not None else HFEndpointStats()
+        self.asset_cache = asset_cache if asset_cache is not None else ImageAssetCache()
         self.token = token
         self.endpoints = endpoints
         if self.token:
@@ -555,35 +1156,132 @@ class ImageGenerator:
         else:
             self.headers = {}
 
-    def _query_hf_api(self, endpoint, payload):
-        """Helper to query a single Hugging Face model endpoint."""
+    def _query_hf_api(self, endpoint, payload, timeout=HF_REQUEST_TIMEOUT_SECONDS):
+        """
+        Helper to query a single Hugging Face model endpoint. Returns (image, estimated_time):
+        the image on success, otherwise None and, if the model is still loading, the seconds
+        the 503 response estimates it needs.
+        """
         print(f"Attempting to generate image with model: {endpoint.split('/')[-1]}...")
+        start = time.perf_counter()
+        success = False
+        loading = False # A loading model is not held against its circuit
         try:
-            response = requests.post(endpoint, headers=self.headers, json=payload, timeout=90)
+            response = self.http.post(endpoint, headers=self.headers, json=payload, timeout=timeout)
 
             if response.status_code == 503:
-                print(f"Model {endpoint.split('/')[-1]} is currently loading. Trying next model.")
-                return None
+                estimated_time = None
+                try:
+                    estimated_time = float(response.json().get('estimated_time'))
+                except (ValueError, TypeError, AttributeError):
+                    pass
+                print(f"Model {endpoint.split('/')[-1]} is currently loading"
+                      f"{f' (estimated {estimated_time:.0f}s)' if estimated_time is not None else ''}.")
+                loading = True
+                return None, estimated_time
 
             response.raise_for_status()
 
             if 'image' in response.headers.get('Content-Type', ''):
+                generated_image = Image.open(io.BytesIO(response.content))
+                generated_image.load() # A body that does not decode counts as a failure
+                success = True
                 print(f"Successfully generated image from {endpoint.split('/')[-1]}.")
-                return Image.open(io.BytesIO(response.content))
+                return self.asset_cache.put([self._cache_key(endpoint, payload['inputs'])], generated_image, f"HF {endpoint.split('/')[-1]}"), None
             else:
                 print(f"Warning: Response from {endpoint.split('/')[-1]} was not an image. Content-Type: {response.headers.get('Content-Type')}. Response: {response.text[:150]}...")
-                return None
+                return None, None
 
         except requests.exceptions.Timeout:
             print(f"Hugging Face API request timed out for model '{endpoint.split('/')[-1]}'.")
-            return None
+            return None, None
         except requests.exceptions.RequestException as e:
             print(f"Error generating image from Hugging Face model {endpoint.split('/')[-1]}: {e}")
-            return None
+            return None, None
         except Exception as e:
             print(f"An unexpected error occurred during Hugging Face image generation: {e}")
+            return None, None
+        finally:
+            self.endpoint_stats.record(endpoint, time.perf_counter() - start, success)
+            if success:
+                self.breakers.record_success(self._circuit_name(endpoint))
+            elif not loading:
+                self.breakers.record_failure(self._circuit_name(endpoint))
+
+    @staticmethod
+    def _circuit_name(endpoint):
+        return f"hf:{endpoint.split('/models/')[-1]}"
+
+    def _cache_key(self, endpoint, prompt):
+        return self.asset_cache.make_key('hf', endpoint.split('/models/')[-1], hashlib.sha256(prompt.encode('utf-8')).hexdigest())
+
+    def _worth_waiting(self, estimated_time, next_endpoint, remaining):
+        """
+        Waiting for a loading model beats failing over when it should be ready sooner than the
+        next endpoint usually takes to produce an image, and within the remaining deadline.
+        """
+        if estimated_time is None or estimated_time > min(HF_MAX_LOADING_WAIT_SECONDS, remaining):
+            return False
+        return next_endpoint is None or estimated_time < self.endpoint_stats.expected_latency(next_endpoint)
+
+    def _generate_concurrently(self, prompt):
+        """
+        Submits the prompt to the HF_CONCURRENT_ENDPOINTS endpoints with the best history at once
+        and returns the first image. A failed endpoint is replaced by the next one, or, when it is
+        a loading model that is worth waiting for, resubmitted with wait_for_model.
+        """
+        queue = self.endpoint_stats.order(self.endpoints)
+        deadline = time.monotonic() + HF_GENERATION_DEADLINE_SECONDS
+        in_flight = {} # future -> (endpoint, already waited for loading)
+
+        def next_endpoint():
+            """Takes the next queued endpoint whose circuit allows a request, or None."""
+            while queue:
+                endpoint = queue.pop(0)
+                if self.breakers.allow(self._circuit_name(endpoint)):
+                    return endpoint
+                print(f"Skipping {endpoint.split('/')[-1]}: its circuit is open.")
             return None
 
+        def launch(endpoint, wait_for_model=False, estimated_time=0.0):
+            payload = {"inputs": prompt}
+            if wait_for_model:
+                payload["options"] = {"wait_for_model": True}
+            timeout = max(1.0, min(HF_REQUEST_TIMEOUT_SECONDS + estimated_time, deadline - time.monotonic()))
+            in_flight[executor.submit(self._query_hf_api, endpoint, payload, timeout)] = (endpoint, wait_for_model)
+
+        with racing_executor(HF_CONCURRENT_ENDPOINTS) as executor:
+            try:
+                while len(in_flight) < HF_CONCURRENT_ENDPOINTS:
+                    endpoint = next_endpoint()
+                    if endpoint is None:
+                        break
+                    launch(endpoint)
+                while in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        print(f"Hugging Face generation deadline of {HF_GENERATION_DEADLINE_SECONDS}s reached.")
+                        break
+                    done, _ = wait(in_flight, timeout=remaining, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        endpoint, waited = in_flight.pop(future)
+                        image, estimated_time = future.result()
+                        if image is not None:
+                            if in_flight:
+                                print(f"Abandoning {', '.join(name.split('/')[-1] for name, _ in in_flight.values())}.")
+                            return image
+                        following_endpoint = queue[0] if queue else None
+                        if not waited and self._worth_waiting(estimated_time, following_endpoint, deadline - time.monotonic()):
+                            print(f"Waiting for {endpoint.split('/')[-1]} to load instead of failing over.")
+                            launch(endpoint, wait_for_model=True, estimated_time=estimated_time)
+                        else:
+                            replacement = next_endpoint()
+                            if replacement is not None:
+                                launch(replacement)
+            finally:
+                self.endpoint_stats.save()
+        return None
+
     def generate_image_from_hf(self, prompt: str):
         """
         Attempts to generate an image from a list of Hugging Face models.
@@ -593,10 +1291,27 @@ class ImageGenerator:
             print("HUGGING_FACE_TOKEN is not set or is a placeholder. Skipping image generation.")
             return None
 
-        for endpoint in self.endpoints:
-            generated_image = self._query_hf_api(endpoint, {"inputs": prompt})
-            if generated_image:
-                return generated_image
+        cached_image = self.asset_cache.get(*(self._cache_key(endpoint, prompt) for endpoint in self.endpoints))
+        if cached_image is not None:
+            return cached_image
+
+        try:
+            if HF_GENERATION_MODE == 'concurrent':
+                generated_image = self._generate_concurrently(prompt)
+                if generated_image:
+                    return generated_image
+            else:
+                for endpoint in self.endpoint_stats.order(self.endpoints):
+                    if not self.breakers.allow(self._circuit_name(endpoint)):
+                        print(f"Skipping {endpoint.split('/')[-1]}: its circuit is open.")
+                        continue
+                    generated_image, _ = self._query_hf_api(endpoint, {"inputs": prompt})
+                    if generated_image:
+                        return generated_image
+        finally:
+            self.endpoint_stats.save()
+            self.asset_cache.save()
+            self.breakers.save()
 
         print("All Hugging Face models failed to generate an image. This could be due to model loading, errors, or timeouts.")
         return None
@@ -605,7 +1320,10 @@ class ImageGenerator:
 class ImageFetcher:
     """Fetches images from Pexels, Unsplash, Openverse, and Pixabay based on text prompts."""
 
-    def __init__(self):
+    def __init__(self, http_sessions=None, asset_cache=None, breakers=None):
+        self.http = http_sessions if http_sessions is not None else HTTPSessionFactory()
+        self.breakers = breakers if breakers is not None else CircuitBreakerRegistry()
+        self.asset_cache = asset_cache if asset_cache is not None else ImageAssetCache()
         self.pexels_api_key = PEXELS_API_KEY
         self.pexels_api_url = PEXELS_API_URL
         self.unsplash_access_key = UNSPLASH_ACCESS_KEY
@@ -614,6 +1332,105 @@ class ImageFetcher:
         self.pixabay_api_key = PIXABAY_API_KEY
         self.pixabay_api_url = PIXABAY_API_URL
 
+    @staticmethod
+    def _with_params(url, params):
+        return f"{url}{'&' if '?' in url else '?'}{urlencode(params)}"
+
+    @staticmethod
+    def _open_for_display(data, width, height):
+        """
+        Opens downloaded image bytes. JPEGs are set to decode at the largest DCT reduction that
+        still covers width x height after the center crop in overlay_text(), which cuts decode
+        time and memory for large originals.
+        """
+        image = Image.open(io.BytesIO(data))
+        if IMAGE_DRAFT_DECODING and image.format == 'JPEG':
+            scale = max(width / image.width, height / image.height)
+            if scale < 1:
+                image.draft(None, (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+        return image
+
+    @staticmethod
+    def _check_dimensions(size):
+        """Raises ValueError for images too large to decode safely or too small to fill the display box."""
+        image_width, image_height = size
+        if image_width * image_height > IMAGE_DOWNLOAD_MAX_PIXELS:
+            raise ValueError(f"image is {image_width}x{image_height}, above the {IMAGE_DOWNLOAD_MAX_PIXELS} pixel cap")
+        if image_width < IMAGE_DOWNLOAD_MIN_WIDTH or image_height < IMAGE_DOWNLOAD_MIN_HEIGHT:
+            raise ValueError(f"image is {image_width}x{image_height}, below the {IMAGE_DOWNLOAD_MIN_WIDTH}x{IMAGE_DOWNLOAD_MIN_HEIGHT} minimum")
+
+    def _stream_image(self, response, width, height):
+        """
+        Reads a streamed image download chunk by chunk into ImageFile.Parser, giving up as soon as
+        the size exceeds IMAGE_DOWNLOAD_MAX_BYTES or the header declares unusable dimensions, so
+        the rest of the body is never transferred. Formats the parser decodes incrementally are
+        decoded as they arrive; the others (JPEG among them) are buffered and then opened with
+        _open_for_display() so JPEGs still get draft decoding. Raises ValueError on rejection.
+        """
+        try:
+            declared_bytes = int(response.headers.get('Content-Length') or 0)
+            if declared_bytes > IMAGE_DOWNLOAD_MAX_BYTES:
+                raise ValueError(f"Content-Length {declared_bytes} exceeds the {IMAGE_DOWNLOAD_MAX_BYTES} byte cap")
+            parser = ImageFile.Parser()
+            buffer = None # Raw bytes, once the header shows the parser cannot decode incrementally
+            received = 0
+            for chunk in response.iter_content(chunk_size=IMAGE_DOWNLOAD_CHUNK_BYTES):
+                received += len(chunk)
+                if received > IMAGE_DOWNLOAD_MAX_BYTES:
+                    raise ValueError(f"download exceeded the {IMAGE_DOWNLOAD_MAX_BYTES} byte cap")
+                if buffer is not None:
+                    buffer += chunk
+                    continue
+                header_known = parser.image is not None
+                parser.feed(chunk)
+                if not header_known and parser.image is not None:
+                    self._check_dimensions(parser.image.size)
+                    if parser.decoder is None:
+                        buffer = bytearray(parser.data or b'')
+        finally:
+            response.close()
+        if buffer is not None:
+            return self._open_for_display(bytes(buffer), width, height)
+        if parser.image is None:
+            raise ValueError("response is not a recognizable image")
+        return parser.close()
+
+    def _provider_get(self, provider, url, **kwargs):
+        """GET against a provider's own API that feeds its circuit breaker. Raises like requests does."""
+        try:
+            response = self.http.get(url, **kwargs)
+            response.raise_for_status()
+        except requests.exceptions.RequestException:
+            self.breakers.record_failure(f"stock:{provider}")
+            raise
+        self.breakers.record_success(f"stock:{provider}")
+        return response
+
+    def _query_cache_key(self, provider, prompt):
+        return self.asset_cache.make_key(provider, 'query', self.asset_cache.normalize_query(prompt))
+
+    def _download(self, provider, prompt, image_url, width, height):
+        """
+        Downloads a found image and caches it under both the query and the URL, or serves it from
+        the asset cache when this URL was downloaded before (e.g. for a differently worded query).
+        """
+        query_key = self._query_cache_key(provider, prompt)
+        url_key = self.asset_cache.make_key(provider, 'url', image_url)
+        cached_image = self.asset_cache.get(url_key)
+        if cached_image is not None:
+            self.asset_cache.alias(query_key, url_key)
+            return cached_image
+        # Not via _provider_get: results (Openverse's especially) live on third-party hosts whose
+        # failures say nothing about the provider's API
+        img_data = self.http.get(image_url, stream=True, timeout=15)
+        img_data.raise_for_status()
+        try:
+            image = self._stream_image(img_data, width, height)
+        except ValueError as e:
+            print(f"Rejected image from {provider}: {e}")
+            return None
+        return self.asset_cache.put([query_key, url_key], image, f"{provider} {image_url}")
+
     def _fetch_from_pexels(self, prompt, width, height):
         try:
             if not self.pexels_api_key or self.pexels_api_key == "YOUR_PEXELS_API_KEY":
@@ -622,15 +1439,14 @@ class ImageFetcher:
             headers = {"Authorization": self.pexels_api_key}
             params = {"query": prompt, "orientation": "portrait", "size": "large", "per_page": 1}
             print(f"Searching Pexels for image with prompt: {prompt[:50]}...")
-            response = requests.get(f"{self.pexels_api_url}/search", headers=headers, params=params, timeout=15)
-            response.raise_for_status()
+            response = self._provider_get('Pexels', f"{self.pexels_api_url}/search", headers=headers, params=params, timeout=15)
             data = response.json()
             if data and data['photos']:
-                image_url = data['photos'][0]['src']['original']
+                src = data['photos'][0]['src']
+                # Pexels serves resized variants of the original through query parameters.
+                image_url = self._with_params(src['original'], {"auto": "compress", "cs": "tinysrgb", "w": width}) if src.get('original') else src['large2x']
                 print(f"Found image on Pexels: {image_url}")
-                img_data = requests.get(image_url, stream=True, timeout=15)
-                img_data.raise_for_status()
-                return Image.open(io.BytesIO(img_data.content))
+                return self._download('Pexels', prompt, image_url, width, height)
             return None
         except requests.exceptions.Timeout:
             print(f"Pexels API request timed out for prompt '{prompt[:50]}...'.")
@@ -649,15 +1465,14 @@ class ImageFetcher:
                 return None
             params = {"query": prompt, "orientation": "portrait", "client_id": self.unsplash_access_key, "per_page": 1}
             print(f"Searching Unsplash for image with prompt: {prompt[:50]}...")
-            response = requests.get(f"{self.unsplash_api_url}/search/photos", params=params, timeout=15)
-            response.raise_for_status()
+            response = self._provider_get('Unsplash', f"{self.unsplash_api_url}/search/photos", params=params, timeout=15)
             data = response.json()
             if data and data['results']:
-                image_url = data['results'][0]['urls']['regular']
+                urls = data['results'][0]['urls']
+                # The raw URL takes imgix sizing parameters; crop to the display box on their side.
+                image_url = self._with_params(urls['raw'], {"w": width, "h": height, "fit": "crop", "fm": "jpg", "q": 80}) if urls.get('raw') else urls['regular']
                 print(f"Found image on Unsplash: {image_url}")
-                img_data = requests.get(image_url, stream=True, timeout=15)
-                img_data.raise_for_status()
-                return Image.open(io.BytesIO(img_data.content))
+                return self._download('Unsplash', prompt, image_url, width, height)
             return None
         except requests.exceptions.Timeout:
             print(f"Unsplash API request timed out for prompt '{prompt[:50]}...'.")
@@ -673,15 +1488,12 @@ class ImageFetcher:
         try:
             params = {"q": prompt, "license_type": "commercial", "image_type": "photo", "orientation": "portrait", "page_size": 1}
             print(f"Searching Openverse for image with prompt: {prompt[:50]}...")
-            response = requests.get(self.openverse_api_url, params=params, timeout=15)
-            response.raise_for_status()
+            response = self._provider_get('Openverse', self.openverse_api_url, params=params, timeout=15)
             data = response.json()
             if data and data['results']:
                 image_url = data['results'][0]['url']
                 print(f"Found image on Openverse: {image_url}")
-                img_data = requests.get(image_url, stream=True, timeout=15)
-                img_data.raise_for_status()
-                return Image.open(io.BytesIO(img_data.content))
+                return self._download('Openverse', prompt, image_url, width, height)
             return None
         except requests.exceptions.Timeout:
             print(f"Openverse API request timed out for prompt '{prompt[:50]}...'.")
@@ -700,16 +1512,18 @@ class ImageFetcher:
                 return None
             params = {"key": self.pixabay_api_key, "q": prompt, "image_type": "photo", "orientation": "vertical", "safesearch": "true", "per_page": 1, "editors_choice": "true", "min_width": width, "min_height": height}
             print(f"Searching Pixabay for image with prompt: {prompt[:50]}...")
-            response = requests.get(self.pixabay_api_url, params=params, timeout=15)
-            response.raise_for_status()
+            response = self._provider_get('Pixabay', self.pixabay_api_url, params=params, timeout=15)
             data = response.json()
             if data and data['hits']:
-                image_url = data['hits'][0].get('largeImageURL') or data['hits'][0].get('webformatURL')
+                hit = data['hits'][0]
+                # webformatURL is 640px wide but has a 960px sibling; largeImageURL is 1280px.
+                if width <= 960 and hit.get('webformatURL'):
+                    image_url = hit['webformatURL'].replace('_640', '_960')
+                else:
+                    image_url = hit.get('largeImageURL') or hit.get('webformatURL')
                 if image_url:
                     print(f"Found image on Pixabay: {image_url}")
-                    img_data = requests.get(image_url, stream=True, timeout=15)
-                    img_data.raise_for_status()
-                    return Image.open(io.BytesIO(img_data.content))
+                    return self._download('Pixabay', prompt, image_url, width, height)
             return None
         except requests.exceptions.Timeout:
             print(f"Pixabay API request timed out for prompt '{prompt[:50]}...'.")
@@ -721,19 +1535,91 @@ class ImageFetcher:
             print(f"An unexpected error occurred during Pixabay fetch: {e}")
             return None
 
+    @staticmethod
+    def _is_configured(key, placeholder):
+        return bool(key) and key != placeholder
+
+    def _configured_providers(self):
+        """(name, fetch method) for every provider that can be queried, in order of preference."""
+        providers = []
+        if self._is_configured(self.pexels_api_key, "YOUR_PEXELS_API_KEY"):
+            providers.append(('Pexels', self._fetch_from_pexels))
+        if self._is_configured(self.unsplash_access_key, "YOUR_UNSPLASH_ACCESS_KEY"):
+            providers.append(('Unsplash', self._fetch_from_unsplash))
+        providers.append(('Openverse', self._fetch_from_openverse)) # Needs no key
+        if self._is_configured(self.pixabay_api_key, "YOUR_PIXABAY_API_KEY"):
+            providers.append(('Pixabay', self._fetch_from_pixabay))
+        return providers
+
+    def _allows(self, name):
+        """
+        True if provider name's circuit allows a request now. Hands out a half-open circuit's probe,
+        so only ask right before querying the provider.
+        """
+        if self.breakers.allow(f"stock:{name}"):
+            return True
+        print(f"Skipping {name}: its circuit is open.")
+        return False
+
+    def _fetch_racing(self, providers, prompt, width, height):
+        """
+        Queries every configured provider at once. Once an image arrives, providers preferred over
+        it get IMAGE_RACE_GRACE_SECONDS more to answer; the most preferred image received wins.
+        Everything is bounded by IMAGE_RACE_DEADLINE_SECONDS and the losers are abandoned.
+        """
+        print(f"Racing {len(providers)} stock photo providers: {', '.join(name for name, _ in providers)}")
+        images = {} # provider rank -> image
+        with racing_executor(len(providers)) as executor:
+            futures = {executor.submit(fetch, prompt, width, height): rank for rank, (_, fetch) in enumerate(providers)}
+            pending = set(futures)
+            deadline = time.monotonic() + IMAGE_RACE_DEADLINE_SECONDS
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    if not images:
+                        print(f"Stock photo race deadline of {IMAGE_RACE_DEADLINE_SECONDS}s reached.")
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    image = future.result() # The fetchers handle their own errors and return None
+                    if image is not None:
+                        images[futures[future]] = image
+                if not images:
+                    continue
+                best_rank = min(images)
+                if all(futures[future] > best_rank for future in pending):
+                    break # Nothing still running would be preferred
+                deadline = min(deadline, time.monotonic() + IMAGE_RACE_GRACE_SECONDS)
+
+        if not images:
+            return None
+        best_rank = min(images)
+        print(f"Using stock photo from {providers[best_rank][0]}.")
+        return images[best_rank]
+
     def fetch_image(self, prompt, width=IMAGE_DISPLAY_WIDTH, height=IMAGE_DISPLAY_HEIGHT):
         if "motivational quote" in prompt.lower() or "inspirational quote" in prompt.lower():
             return None
 
-        fetched_image = None
-        fetched_image = self._fetch_from_pexels(prompt, width, height)
-        if fetched_image is None:
-            fetched_image = self._fetch_from_unsplash(prompt, width, height)
-        if fetched_image is None:
-            fetched_image = self._fetch_from_openverse(prompt, width, height)
-        if fetched_image is None:
-            fetched_image = self._fetch_from_pixabay(prompt, width, height)
-        return fetched_image
+        cached_image = self.asset_cache.get(*(self._query_cache_key(name, prompt) for name, _ in self._configured_providers()))
+        if cached_image is not None:
+            return cached_image
+
+        try:
+            if IMAGE_FETCH_MODE == 'race':
+                providers = [(name, fetch) for name, fetch in self._configured_providers() if self._allows(name)]
+                return self._fetch_racing(providers, prompt, width, height) if providers else None
+
+            for name, fetch in self._configured_providers():
+                if not self._allows(name):
+                    continue
+                fetched_image = fetch(prompt, width, height)
+                if fetched_image is not None:
+                    return fetched_image
+            return None
+        finally:
+            self.asset_cache.save()
+            self.breakers.save()
 
 
 class ImageLocalProcessor:
@@ -813,27 +1699,20 @@ class ImageLocalProcessor:
         content_type = post_data.get('content_type_display', 'general_news').lower()
         final_canvas = None
         draw = None
-        dummy_draw_for_text_bbox = ImageDraw.Draw(Image.new('RGB', (1,1)))
 
         try:
             if content_type == 'motivational_quote_post':
                 quote_text = post_data.get('title', 'No Quote')
                 quote_author = post_data.get('summary', 'Unknown')
 
-                background_gen = BackgroundGenerator()
-                final_canvas = background_gen.generate_gradient_background(CANVAS_WIDTH, CANVAS_HEIGHT,
-                                                                            QUOTE_COLOR_BACKGROUND_LIGHT,
-                                                                            tuple(int(c * 0.9) for c in QUOTE_COLOR_BACKGROUND_LIGHT[:3]) + (255,))
+                final_canvas = template_layer_cache.get_quote_template(CANVAS_WIDTH, CANVAS_HEIGHT)
                 draw = ImageDraw.Draw(final_canvas)
 
                 font_quote = load_font(FONT_PATH_ALFA_SLAB_ONE, FONT_SIZE_QUOTE)
                 text_area_width = CANVAS_WIDTH - (2 * LEFT_PADDING)
-                wrapped_quote_lines = textwrap.wrap(quote_text, width=int(text_area_width / (FONT_SIZE_QUOTE * 0.5)), break_long_words=False)
+                wrapped_quote_lines = text_layout_engine.wrap(quote_text, font_quote, text_area_width)
 
-                total_quote_height = 0
-                for line in wrapped_quote_lines:
-                    line_bbox = dummy_draw_for_text_bbox.textbbox((0,0), line, font=font_quote)
-                    total_quote_height += (line_bbox[3] - line_bbox[1]) + 15
+                total_quote_height = sum(line.height + 15 for line in wrapped_quote_lines)
 
                 current_y = (CANVAS_HEIGHT - total_quote_height) // 2
                 
@@ -841,58 +1720,27 @@ class ImageLocalProcessor:
                     current_y = TOP_PADDING + 50
 
                 for line in wrapped_quote_lines:
-                    line_bbox = dummy_draw_for_text_bbox.textbbox((0,0), line, font=font_quote)
-                    line_width = line_bbox[2] - line_bbox[0]
-                    text_x_centered = (CANVAS_WIDTH - line_width) // 2
-                    draw.text((text_x_centered, current_y), line, font=font_quote, fill=QUOTE_COLOR_TEXT_DARK)
-                    current_y += (line_bbox[3] - line_bbox[1]) + 15
+                    text_x_centered = (CANVAS_WIDTH - line.width) // 2
+                    draw.text((text_x_centered, current_y), line.text, font=font_quote, fill=QUOTE_COLOR_TEXT_DARK)
+                    current_y += line.height + 15
 
                 if quote_author and quote_author != "Unknown":
                     font_author = load_font(FONT_PATH_REGULAR, FONT_SIZE_QUOTE_AUTHOR)
-                    author_bbox = dummy_draw_for_text_bbox.textbbox((0,0), quote_author, font=font_author)
-                    author_width = author_bbox[2] - author_bbox[0]
+                    author_width = text_layout_engine.measure(quote_author, font_author).width
                     draw.text(((CANVAS_WIDTH - author_width) // 2, current_y + 40),
                               quote_author, font=font_author, fill=QUOTE_COLOR_ACCENT)
 
-                try:
-                    logo_image = Image.open(LOGO_PATH).convert("RGBA")
-                    logo_image.thumbnail((QUOTE_LOGO_WIDTH, QUOTE_LOGO_HEIGHT), Image.Resampling.LANCZOS)
-                    logo_x = (CANVAS_WIDTH - QUOTE_LOGO_WIDTH) // 2
-                    logo_y = CANVAS_HEIGHT - QUOTE_LOGO_BOTTOM_MARGIN - QUOTE_LOGO_HEIGHT
-                    final_canvas.paste(logo_image, (logo_x, logo_y), logo_image)
-                except FileNotFoundError:
-                    print(f"Warning: Logo file not found at {LOGO_PATH}. Skipping logo for quote post.")
-                except Exception as e:
-                    print(f"Error embedding logo for quote post: {e}. Skipping logo for quote post.")
-
             else:
-                background_gen = BackgroundGenerator()
-                final_canvas = background_gen.generate_gradient_background(CANVAS_WIDTH, CANVAS_HEIGHT,
-                                                                            COLOR_GRADIENT_TOP_LEFT, COLOR_GRADIENT_BOTTOM_RIGHT)
-                draw = ImageDraw.Draw(final_canvas)
-
-                content_type_map = {
-                    'startup_news': "STARTUP INSIGHTS",
-                    'business_news': "BUSINESS PULSE",
-                    'financial_news': "FINANCIAL FOCUS",
-                    'entrepreneurial_news': "ENTREPRENEUR VISION",
-                }
-                content_type_display = content_type_map.get(content_type, "INSIGHT PULSE")
-
+                content_type_display = NEWS_CATEGORY_HEADERS.get(content_type, "INSIGHT PULSE")
                 font_top_left_text = load_font(FONT_PATH_ALFA_SLAB_ONE, FONT_SIZE_TOP_LEFT_TEXT)
-                draw.text((TOP_LEFT_TEXT_POS_X, TOP_LEFT_TEXT_POS_Y), content_type_display, font=font_top_left_text, fill=COLOR_TOP_LEFT_TEXT)
 
                 timestamp_text = datetime.now().strftime("%d %b %Y | %H:%M")
                 font_timestamp = load_font(FONT_PATH_REGULAR, FONT_SIZE_TIMESTAMP)
-                timestamp_bbox = dummy_draw_for_text_bbox.textbbox((0,0), timestamp_text, font=font_timestamp)
-                timestamp_width = timestamp_bbox[2] - timestamp_bbox[0]
-
-                draw.text((TIMESTAMP_POS_X_RIGHT_ALIGN - timestamp_width, TIMESTAMP_POS_Y),
-                          timestamp_text, font=font_timestamp, fill=COLOR_TIMESTAMP_TEXT)
+                timestamp_line = text_layout_engine.measure(timestamp_text, font_timestamp)
 
                 image_start_y = max(
-                    TOP_LEFT_TEXT_POS_Y + (dummy_draw_for_text_bbox.textbbox((0,0), content_type_display, font=font_top_left_text)[3] - dummy_draw_for_text_bbox.textbbox((0,0), content_type_display, font=font_top_left_text)[1]),
-                    TIMESTAMP_POS_Y + (timestamp_bbox[3] - timestamp_bbox[1])
+                    TOP_LEFT_TEXT_POS_Y + text_layout_engine.measure(content_type_display, font_top_left_text).height,
+                    TIMESTAMP_POS_Y + timestamp_line.height
                 ) + IMAGE_TOP_MARGIN_FROM_TOP_ELEMENTS
 
                 target_aspect_ratio = IMAGE_DISPLAY_WIDTH / IMAGE_DISPLAY_HEIGHT
@@ -914,85 +1762,57 @@ class ImageLocalProcessor:
                 cropped_image = base_pil_image.crop((left, top, right, bottom))
                 news_image_for_display = cropped_image.resize((IMAGE_DISPLAY_WIDTH, IMAGE_DISPLAY_HEIGHT), Image.Resampling.LANCZOS)
 
-                temp_img = Image.new("RGBA", news_image_for_display.size, (0, 0, 0, 0))
-                temp_draw = ImageDraw.Draw(temp_img)
-                shadow_offset = 8
-                shadow_color = (0, 0, 0, 80)
-                temp_draw.rounded_rectangle(
-                    (shadow_offset, shadow_offset, IMAGE_DISPLAY_WIDTH + shadow_offset, IMAGE_DISPLAY_HEIGHT + shadow_offset),
-                    radius=IMAGE_ROUND_RADIUS, fill=shadow_color
-                )
-                shadow_img = temp_img.filter(ImageFilter.GaussianBlur(radius=8))
-
-                mask = Image.new('L', (IMAGE_DISPLAY_WIDTH, IMAGE_DISPLAY_HEIGHT), 0)
-                mask_draw = ImageDraw.Draw(mask)
-                mask_draw.rounded_rectangle((0, 0, IMAGE_DISPLAY_WIDTH, IMAGE_DISPLAY_HEIGHT),
-                                            radius=IMAGE_ROUND_RADIUS, fill=255)
-
-                news_image_x = (CANVAS_WIDTH - IMAGE_DISPLAY_WIDTH) // 2
-                
-                final_canvas.paste(shadow_img, (news_image_x, int(image_start_y)), shadow_img)
-                final_canvas.paste(news_image_for_display, (news_image_x, int(image_start_y)), mask)
-
                 title_text_raw = str(post_data.get('title', 'NO TITLE')).upper()
                 font_headline = load_font(FONT_PATH_ALFA_SLAB_ONE, FONT_SIZE_HEADLINE)
 
                 text_area_width = CANVAS_WIDTH - (LEFT_PADDING + RIGHT_PADDING)
-                wrapped_title_lines = wrap_text_by_word_count(title_text_raw, font_headline, text_area_width, max_words=TITLE_MAX_WORDS)
-
-                current_y_title = image_start_y + IMAGE_DISPLAY_HEIGHT + TITLE_TOP_MARGIN_FROM_IMAGE
-
-                for line in wrapped_title_lines:
-                    line_bbox = dummy_draw_for_text_bbox.textbbox((0,0), line, font=font_headline)
-                    line_width = line_bbox[2] - line_bbox[0]
-
-                    text_x_centered = (CANVAS_WIDTH - line_width) / 2
-                    draw.text((text_x_centered, current_y_title), line, font=font_headline, fill=COLOR_HEADLINE_TEXT)
-                    current_y_title += (line_bbox[3] - line_bbox[1]) + TITLE_LINE_SPACING
+                wrapped_title_lines = text_layout_engine.wrap(title_text_raw, font_headline, text_area_width, max_words=TITLE_MAX_WORDS)
 
                 summary_text_raw = str(post_data.get('summary', 'No summary provided.')).replace("&#x27;", "'").replace("&quot;", "\"")
                 font_summary = load_font(FONT_PATH_TAPESTRY, FONT_SIZE_SUMMARY)
 
-                wrapped_summary_lines = wrap_text_by_word_count(summary_text_raw, font_summary,
-                                                               CANVAS_WIDTH - (LEFT_PADDING + RIGHT_PADDING),
-                                                               max_words=SUMMARY_MAX_WORDS)
-                if len(wrapped_summary_lines) > SUMMARY_MAX_LINES:
-                    wrapped_summary_lines = wrapped_summary_lines[:SUMMARY_MAX_LINES]
-                    wrapped_summary_lines[-1] = wrapped_summary_lines[-1].strip() + "..."
+                wrapped_summary_lines = text_layout_engine.wrap(summary_text_raw, font_summary,
+                                                                CANVAS_WIDTH - (LEFT_PADDING + RIGHT_PADDING),
+                                                                max_words=SUMMARY_MAX_WORDS,
+                                                                max_lines=SUMMARY_MAX_LINES)
 
-                current_y_summary = current_y_title + SUMMARY_TOP_MARGIN_FROM_TITLE
+                # Lay out the whole post first: the logo only lives in the template when the
+                # summary leaves it at its default position.
+                title_top_y = image_start_y + IMAGE_DISPLAY_HEIGHT + TITLE_TOP_MARGIN_FROM_IMAGE
+                summary_top_y = title_top_y + sum(line.height + TITLE_LINE_SPACING for line in wrapped_title_lines) + SUMMARY_TOP_MARGIN_FROM_TITLE
+                summary_bottom_y = summary_top_y + sum(line.height + SUMMARY_LINE_SPACING for line in wrapped_summary_lines) - SUMMARY_LINE_SPACING
 
-                for line in wrapped_summary_lines:
-                    draw.text((LEFT_PADDING, current_y_summary), line, font=font_summary, fill=COLOR_SUMMARY_TEXT)
-                    line_height = (dummy_draw_for_text_bbox.textbbox((0,0), line, font=font_summary)[3] - dummy_draw_for_text_bbox.textbbox((0,0), line, font=font_summary)[1])
-                    current_y_summary += line_height + SUMMARY_LINE_SPACING
+                divider_y = summary_bottom_y + DIVIDER_Y_OFFSET_FROM_SUMMARY
+                default_logo_y = TemplateLayerCache.default_news_logo_y(CANVAS_HEIGHT)
+                logo_final_y = max(default_logo_y, divider_y + 20)
+                logo_in_template = logo_final_y == default_logo_y
 
-                current_y_summary -= SUMMARY_LINE_SPACING
-
-                divider_y = current_y_summary + DIVIDER_Y_OFFSET_FROM_SUMMARY
-                draw.line([(LEFT_PADDING, divider_y), (CANVAS_WIDTH - RIGHT_PADDING, divider_y)], fill=COLOR_DIVIDER_LINE, width=DIVIDER_LINE_THICKNESS)
+                final_canvas = template_layer_cache.get_news_template(content_type, CANVAS_WIDTH, CANVAS_HEIGHT,
+                                                                      include_logo=logo_in_template)
+                draw = ImageDraw.Draw(final_canvas)
 
-                logo_final_y = CANVAS_HEIGHT - BOTTOM_PADDING - LOGO_HEIGHT - LOGO_BOTTOM_MARGIN
-                logo_final_y = max(logo_final_y, divider_y + 20)
+                draw.text((TIMESTAMP_POS_X_RIGHT_ALIGN - timestamp_line.width, TIMESTAMP_POS_Y),
+                          timestamp_text, font=font_timestamp, fill=COLOR_TIMESTAMP_TEXT)
 
-                try:
-                    logo_image = Image.open(LOGO_PATH).convert("RGBA")
-                    logo_image.thumbnail((LOGO_WIDTH, LOGO_HEIGHT), Image.Resampling.LANCZOS)
-                    final_canvas.paste(logo_image, (LEFT_PADDING, int(logo_final_y)), logo_image)
+                news_image_x = (CANVAS_WIDTH - IMAGE_DISPLAY_WIDTH) // 2
+                card_effects.composite_card(final_canvas, news_image_for_display, (news_image_x, int(image_start_y)))
 
-                except FileNotFoundError:
-                    print(f"Warning: Logo file not found at {LOGO_PATH}. Embedding text fallback.")
-                    draw.text((LEFT_PADDING, int(logo_final_y) + (LOGO_HEIGHT - 30) // 2), "Insight Pulse", font=load_font(FONT_PATH_BOLD, 30), fill=COLOR_SOURCE_TEXT)
-                except Exception as e:
-                    print(f"Error embedding logo: {e}. Embedding text fallback.")
-                    draw.text((LEFT_PADDING, int(logo_final_y) + (LOGO_HEIGHT - 30) // 2), "Insight Pulse (Error)", font=load_font(FONT_PATH_BOLD, 30), fill=COLOR_SOURCE_TEXT)
+                current_y_title = title_top_y
+                for line in wrapped_title_lines:
+                    text_x_centered = (CANVAS_WIDTH - line.width) / 2
+                    draw.text((text_x_centered, current_y_title), line.text, font=font_headline, fill=COLOR_HEADLINE_TEXT)
+                    current_y_title += line.height + TITLE_LINE_SPACING
 
+                current_y_summary = summary_top_y
+                for line in wrapped_summary_lines:
+                    draw.text((LEFT_PADDING, current_y_summary), line.text, font=font_summary, fill=COLOR_SUMMARY_TEXT)
+                    current_y_summary += line.height + SUMMARY_LINE_SPACING
 
-            if final_canvas:
-                border_rect = [(BORDER_THICKNESS // 2, BORDER_THICKNESS // 2),
-                               (CANVAS_WIDTH - BORDER_THICKNESS // 2, CANVAS_HEIGHT - BORDER_THICKNESS // 2)]
-                draw.rectangle(border_rect, outline=BORDER_COLOR, width=BORDER_THICKNESS)
+                draw.line([(LEFT_PADDING, divider_y), (CANVAS_WIDTH - RIGHT_PADDING, divider_y)], fill=COLOR_DIVIDER_LINE, width=DIVIDER_LINE_THICKNESS)
 
+                if not logo_in_template:
+                    template_layer_cache.paste_news_logo(final_canvas, logo_final_y)
+                    template_layer_cache.redraw_border(final_canvas)
 
             return final_canvas
 
@@ -1018,15 +1838,17 @@ class CloudinaryUploader:
             api_secret=CLOUDINARY_API_SECRET
         )
 
-    def upload_image(self, image_path, public_id, folder="news_posts"):
+    def upload_image(self, image, public_id, folder="news_posts"):
+        """Uploads an image given as a file path or as a file-like object holding the encoded bytes."""
         try:
             if not CLOUDINARY_CLOUD_NAME or CLOUDINARY_CLOUD_NAME == "YOUR_CLOUDINARY_CLOUD_NAME":
                 print("Cloudinary credentials are not set or are placeholders. Skipping upload.")
                 return None
 
-            print(f"Uploading {image_path} to Cloudinary folder '{folder}' with public_id '{public_id}'...")
+            image_label = image if isinstance(image, str) else f"in-memory image ({image.getbuffer().nbytes} bytes)"
+            print(f"Uploading {image_label} to Cloudinary folder '{folder}' with public_id '{public_id}'...")
             upload_result = cloudinary.uploader.upload(
-                image_path,
+                image,
                 public_id=public_id,
                 folder=folder
             )
@@ -1045,7 +1867,8 @@ class CloudinaryUploader:
 class InstagramPoster:
     """Handles posting images to Instagram via the Facebook Graph API."""
 
-    def __init__(self):
+    def __init__(self, http_sessions=None):
+        self.http = http_sessions if http_sessions is not None else HTTPSessionFactory()
         self.access_token = FB_PAGE_ACCESS_TOKEN
         self.instagram_business_account_id = INSTAGRAM_BUSINESS_ACCOUNT_ID
         self.graph_api_base_url = "https://graph.facebook.com/v19.0/"
@@ -1069,7 +1892,7 @@ class InstagramPoster:
             'access_token': self.access_token
         }
         try:
-            response = requests.post(media_container_url, params=media_params, timeout=30)
+            response = self.http.post(media_container_url, params=media_params, timeout=30)
             response.raise_for_status()
             media_container_id = response.json().get('id')
             print(f"Media container created with ID: {media_container_id}")
@@ -1093,7 +1916,7 @@ class InstagramPoster:
             'access_token': self.access_token
         }
         try:
-            response = requests.post(publish_url, params=publish_params, timeout=30)
+            response = self.http.post(publish_url, params=publish_params, timeout=30)
             response.raise_for_status()
             post_id = response.json().get('id')
             if post_id:
@@ -1116,7 +1939,8 @@ class InstagramPoster:
 class LocalSaver:
     """Saves data and images locally to JSON and Excel."""
 
-    def __init__(self, image_output_dir, json_output_dir, excel_output_dir, all_posts_json_file, all_posts_excel_file):
+    def __init__(self, image_output_dir, json_output_dir, excel_output_dir, all_posts_json_file, all_posts_excel_file, encoder=None):
+        self.encoder = encoder if encoder is not None else OutputEncoder()
         self.IMAGE_OUTPUT_DIR = image_output_dir
         self.JSON_OUTPUT_DIR = json_output_dir
         self.EXCEL_OUTPUT_DIR = excel_output_dir
@@ -1125,22 +1949,65 @@ class LocalSaver:
         os.makedirs(self.IMAGE_OUTPUT_DIR, exist_ok=True)
         os.makedirs(self.JSON_OUTPUT_DIR, exist_ok=True)
         os.makedirs(self.EXCEL_OUTPUT_DIR, exist_ok=True)
+        # Image files are written off the publish path, one at a time, in order.
+        self._image_writer = ThreadPoolExecutor(max_workers=1)
+        self._pending_writes = {} # Post_ID -> (image_path, future)
+
+    def encode_image(self, image):
+        """Encodes the final post image once; the EncodedImage is shared by the local copy and the upload."""
+        return self.encoder.encode(image)
+
+    @staticmethod
+    def _write_image(image_path, encoded_image):
+        temp_path = f"{image_path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(encoded_image)
+        os.replace(temp_path, image_path)
+        print(f"Image saved to: {image_path}")
+
+    def flush(self):
+        """Waits for image writes whose post was never saved and reports any that failed."""
+        pending, self._pending_writes = self._pending_writes, {}
+        for image_path, future in pending.values():
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error saving image to {image_path}: {e}")
 
-    def save_post(self, post_data, workflow_manager_instance):
-        """Saves a single post's data and image."""
+    def assign_post_id(self, post_data, workflow_manager_instance):
+        """Sets and returns the post's Post_ID, which also names its image file and Cloudinary asset."""
         post_type_label = post_data.get('type', 'post').replace('_', '-')
         timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
         post_id = f"{post_type_label}_{timestamp_str}_post-{workflow_manager_instance.get_current_post_number()}"
 
         post_data['Post_ID'] = post_id
+        return post_id
 
-        image_filename = f"{post_id}.png"
-        image_path = os.path.join(self.IMAGE_OUTPUT_DIR, image_filename)
+    def start_image_write(self, post_data, encoded_image):
+        """Starts writing the encoded image (from encode_image()) of a post with a Post_ID in the background."""
+        image_path = os.path.join(self.IMAGE_OUTPUT_DIR, f"{post_data['Post_ID']}.{encoded_image.extension}")
+        self._pending_writes[post_data['Post_ID']] = (image_path, self._image_writer.submit(self._write_image, image_path, encoded_image.data))
 
-        if 'final_image' in post_data and isinstance(post_data['final_image'], Image.Image):
+    def save_post(self, post_data, workflow_manager_instance):
+        """
+        Saves a single post's data and image. An image write started with start_image_write() is
+        waited for, so the record only points to a file that exists; otherwise final_image is
+        encoded and written here. Returns True if the record was appended to all_posts.json.
+        """
+        post_id = post_data.get('Post_ID') or self.assign_post_id(post_data, workflow_manager_instance)
+        image_path = os.path.join(self.IMAGE_OUTPUT_DIR, f"{post_id}.{self.encoder.EXTENSIONS[self.encoder.output_format]}")
+
+        pending_write = self._pending_writes.pop(post_id, None)
+        if pending_write is not None:
+            image_path, future = pending_write
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error saving image to {image_path}: {e}")
+                image_path = "Error saving image"
+        elif 'final_image' in post_data and isinstance(post_data['final_image'], Image.Image):
             try:
-                post_data['final_image'].save(image_path)
-                print(f"Image saved to: {image_path}")
+                self._write_image(image_path, self.encode_image(post_data['final_image']).data)
             except Exception as e:
                 print(f"Error saving image to {image_path}: {e}")
                 image_path = "Error saving image"
@@ -1172,9 +2039,11 @@ class LocalSaver:
                 "Storytelling_Method": post_data.get('storytelling_method', 'N/A'),
                 "Source_URL": post_data.get('url', ''),
                 "Original_Source": post_data.get('source', 'N/A'),
+                "Original_Title": post_data.get('original_title', 'N/A'),
                 "Original_Description": post_data.get('original_description', 'N/A')
             })
 
+        appended = False
         try:
             existing_data = []
             if os.path.exists(self.ALL_POSTS_JSON_FILE):
@@ -1191,6 +2060,7 @@ class LocalSaver:
 
             with open(self.ALL_POSTS_JSON_FILE, 'w', encoding='utf-8') as f:
                 json.dump(existing_data, f, indent=4)
+            appended = True
             print(f"Metadata appended to: {self.ALL_POSTS_JSON_FILE}")
         except Exception as e:
             print(f"Error saving to JSON file {self.ALL_POSTS_JSON_FILE}: {e}")
@@ -1214,6 +2084,8 @@ class LocalSaver:
         except Exception as e:
             print(f"Error saving to Excel file {self.ALL_POSTS_EXCEL_FILE}: {e}")
 
+        return appended
+
     def load_all_posts_data(self):
         if os.path.exists(self.ALL_POSTS_JSON_FILE):
             try:
@@ -1336,14 +2208,15 @@ def perform_weekly_analysis(ai_client_for_analysis, local_saver_instance):
 
     print("Sending past content data to Deepseek R1 for weekly analysis...")
     try:
-        response = ai_client_for_analysis.chat.completions.create(
+        response_text = llm_response_cache.complete(
+            ai_client_for_analysis,
             model=OPENROUTER_DEEPSEEK_R1_MODEL,
             messages=[{"role": "system", "content": system_message}, {"role": "user", "content": prompt}],
             max_tokens=1500,
             temperature=0.7,
             extra_headers={"HTTP-Referer": OPENROUTER_SITE_URL, "X-Site-Name": OPENROUTER_SITE_NAME},
         )
-        recommendations_text = response.choices[0].message.content.strip()
+        recommendations_text = (response_text or '').strip()
 
         if recommendations_text:
             print("Deepseek R1 Weekly Analysis Result:\n", recommendations_text)
@@ -1420,14 +2293,15 @@ def perform_internal_instagram_performance_analysis(ai_client_for_analysis, inst
 
     print("Sending internal Instagram post data to Deepseek R1 for performance analysis...")
     try:
-        response = ai_client_for_analysis.chat.completions.create(
+        response_text = llm_response_cache.complete(
+            ai_client_for_analysis,
             model=OPENROUTER_DEEPSEEK_R1_MODEL,
             messages=[{"role": "system", "content": system_message}, {"role": "user", "content": prompt}],
             max_tokens=1500,
             temperature=0.7,
             extra_headers={"HTTP-Referer": OPENROUTER_SITE_URL, "X-Site-Name": OPENROUTER_SITE_NAME},
         )
-        analysis_result_text = response.choices[0].message.content.strip()
+        analysis_result_text = (response_text or '').strip()
 
         if analysis_result_text:
             print("Deepseek R1 Internal Instagram Analysis Result:\n", analysis_result_text)
@@ -1499,14 +2373,15 @@ def perform_external_instagram_analysis(ai_client_for_analysis):
     """
     print("Sending conceptual external Instagram post data to Deepseek R1 for analysis...")
     try:
-        response = ai_client_for_analysis.chat.completions.create(
+        response_text = llm_response_cache.complete(
+            ai_client_for_analysis,
             model=OPENROUTER_DEEPSEEK_R1_MODEL,
             messages=[{"role": "system", "content": system_message}, {"role": "user", "content": prompt}],
             max_tokens=1500,
             temperature=0.7,
             extra_headers={"HTTP-Referer": OPENROUTER_SITE_URL, "X-Site-Name": OPENROUTER_SITE_NAME},
         )
-        analysis_result_text = response.choices[0].message.content.strip()
+        analysis_result_text = (response_text or '').strip()
 
         if analysis_result_text:
             print("Deepseek R1 Conceptual External Instagram Analysis Result:\n", analysis_result_text)
@@ -1557,16 +2432,114 @@ def check_api_keys():
         print("----------------------------------------\n")
 
 # --- Main Workflow Execution ---
-def run_workflow():
+class StageGraph:
+    """
+    Runs a post's stages as a small dependency graph on a thread pool: every stage starts as soon
+    as the stages it depends on have finished, so independent work (e.g. the caption LLM call and
+    image generation) overlaps. Across a batch each stage also handles posts one at a time and in
+    order, which pipelines consecutive posts. After the first stage error no new stages are
+    started, and the error is kept for the caller to raise.
+    """
+
+    def __init__(self, stages):
+        self.stages = stages # [(name, function(job), [names of stages it depends on])], in dependency order
+        self.error = None
+        self.timings = {} # (job_index, stage_name) -> (start, end), seconds since the run started
+
+    def _prerequisites(self, job_index, stage_name, dependencies):
+        prerequisites = [(job_index, dependency) for dependency in dependencies]
+        if job_index > 0:
+            prerequisites.append((job_index - 1, stage_name))
+        return prerequisites
+
+    def _run_stage(self, name, function, job):
+        start = time.perf_counter() - self._started
+        try:
+            function(job)
+        finally:
+            job['stage_timings'][name] = (start, time.perf_counter() - self._started)
+
+    def run(self, jobs):
+        """Runs every stage of every job and returns the jobs."""
+        for job in jobs:
+            job['stage_timings'] = {}
+        pending = {(job_index, name): (function, self._prerequisites(job_index, name, dependencies))
+                   for job_index in range(len(jobs)) for name, function, dependencies in self.stages}
+        done = set()
+        running = {}
+        self._started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=len(self.stages)) as executor:
+            while pending or running:
+                if self.error is None:
+                    for key in [key for key, (_, prerequisites) in pending.items() if all(p in done for p in prerequisites)]:
+                        function, _ = pending.pop(key)
+                        running[executor.submit(self._run_stage, key[1], function, jobs[key[0]])] = key
+                if not running:
+                    break # Stopped after an error
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    key = running.pop(future)
+                    done.add(key)
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"\nError in '{key[1]}' stage of post {key[0] + 1}: {e}")
+                        import traceback
+                        traceback.print_exc()
+                        if self.error is None:
+                            self.error = e
+
+        self.timings = {(job_index, name): span for job_index, job in enumerate(jobs)
+                        for name, span in job['stage_timings'].items()}
+        return jobs
+
+    def critical_path(self):
+        """
+        Walks back from the stage that finished last, each time following the prerequisite that
+        finished latest. Returns [(job_index, stage_name, start, end)].
+        """
+        if not self.timings:
+            return []
+        dependencies = {name: stage_dependencies for name, _, stage_dependencies in self.stages}
+        key = max(self.timings, key=lambda k: self.timings[k][1])
+        path = []
+        while key is not None:
+            start, end = self.timings[key]
+            path.append((key[0], key[1], start, end))
+            prerequisites = [p for p in self._prerequisites(key[0], key[1], dependencies[key[1]]) if p in self.timings]
+            key = max(prerequisites, key=lambda k: self.timings[k][1]) if prerequisites else None
+        return list(reversed(path))
+
+    def report(self):
+        """Prints per-post stage timings and the run's critical path."""
+        job_count = max((job_index for job_index, _ in self.timings), default=-1) + 1
+        print("\nStage timings:")
+        for job_index in range(job_count):
+            breakdown = ', '.join(f"{name} {self.timings[(job_index, name)][1] - self.timings[(job_index, name)][0]:.1f}s"
+                                  for name, _, _ in self.stages if (job_index, name) in self.timings)
+            print(f"  Post {job_index + 1}: {breakdown}")
+
+        path = self.critical_path()
+        if not path:
+            return
+        busy_total = sum(end - start for _, _, start, end in path)
+        wall_time = path[-1][3]
+        steps = ' -> '.join(f"{name}#{job_index + 1} ({end - start:.1f}s)" for job_index, name, start, end in path)
+        print(f"Critical path ({wall_time:.1f}s wall, {busy_total:.1f}s in stages): {steps}")
+
+
+def run_workflow(post_count=1):
+    """Produces post_count posts, walking CONTENT_TYPE_CYCLE, with the per-post stages pipelined."""
     workflow_manager = WorkflowStateManager()
-    news_fetcher = NewsFetcher()
+    news_fetcher = NewsFetcher(http_sessions=http_sessions)
     text_processor = TextProcessor()
-    image_generator = ImageGenerator(HUGGING_FACE_TOKEN, INFERENCE_API_ENDPOINTS) # NEW
-    image_fetcher = ImageFetcher()
+    image_generator = ImageGenerator(HUGGING_FACE_TOKEN, INFERENCE_API_ENDPOINTS, http_sessions=http_sessions, asset_cache=image_asset_cache, breakers=circuit_breakers) # NEW
+    image_fetcher = ImageFetcher(http_sessions=http_sessions, asset_cache=image_asset_cache, breakers=circuit_breakers)
     image_local_processor = ImageLocalProcessor()
     caption_generator = CaptionGenerator()
     cloudinary_uploader = CloudinaryUploader()
-    instagram_poster = InstagramPoster()
+    instagram_poster = InstagramPoster(http_sessions=http_sessions)
     local_saver = LocalSaver(IMAGE_OUTPUT_DIR, JSON_OUTPUT_DIR, EXCEL_OUTPUT_DIR, ALL_POSTS_JSON_FILE, ALL_POSTS_EXCEL_FILE)
 
     ai_client_for_analysis = OpenAI(
@@ -1617,15 +2590,7 @@ def run_workflow():
         print("\nNo specific style recommendations to apply at this time.\n")
 
 
-    content_type_for_this_run = workflow_manager.get_current_post_type()
-    post_number_for_this_run = workflow_manager.get_current_post_number()
-
-    print(f"\n--- Processing Post {post_number_for_this_run}/{len(CONTENT_TYPE_CYCLE)} (Type: {content_type_for_this_run.replace('_', ' ').title()}) ---")
-
-    post_to_process = {'type': content_type_for_this_run, 'content_type_display': content_type_for_this_run}
-    final_pil_image = None
-
-    def generate_motivational_quote_with_ai(content_hint: str, ai_client_instance: OpenAI, api_key: str, site_url: str, site_name: str):
+    def generate_motivational_quote_with_ai(content_hint: str, ai_client_instance: OpenAI, api_key: str, site_url: str, site_name: str, cache_scope=None):
         if not api_key or api_key == "sk-or-v1-YOUR_DEEPSEEK_CHAT_API_KEY_HERE":
             print("OPENROUTER_API_KEY for Deepseek Chat is not set or is a placeholder. Skipping AI quote generation.")
             return {"quote": "The only way to do great work is to love what you do.", "author": "Steve Jobs (Fallback)"}
@@ -1647,19 +2612,21 @@ def run_workflow():
         ]
 
         try:
-            completion = ai_client_instance.chat.completions.create(
+            # The quote prompt barely varies, so answers are only reused for a retry of the same post slot.
+            ai_content_str = llm_response_cache.complete(
+                ai_client_instance,
+                scope=cache_scope,
                 extra_headers={
                     "HTTP-Referer": site_url,
                     "X-Title": site_name,
                 },
-                model=OPENROUTER_MODEL,
+                model=LLM_TEXT_MODEL_CHAIN,
                 messages=messages,
                 temperature=0.9,
                 max_tokens=100,
                 response_format={"type": "json_object"}
             )
-            if completion.choices and completion.choices[0].message and completion.choices[0].message.content:
-                ai_content_str = completion.choices[0].message.content
+            if ai_content_str:
                 try:
                     parsed_data = json.loads(ai_content_str)
                     quote = parsed_data.get('quote', "Innovation is seeing what everybody has seen and thinking what nobody else has thought.")
@@ -1675,69 +2642,135 @@ def run_workflow():
             print(f"Error generating quote with AI: {e}")
             return {"quote": "The only way to do great work is to love what you do.", "author": "Steve Jobs (API Error)"}
 
+    def article_stage(job):
+        """Picks the post's content: a generated quote, or a fresh news article."""
+        content_type_for_this_run = job['content_type']
+        post_to_process = job['post']
+
+        print(f"\n--- Processing Post {job['post_number']}/{len(CONTENT_TYPE_CYCLE)} (Type: {content_type_for_this_run.replace('_', ' ').title()}) ---")
+
+        if content_type_for_this_run == 'motivational_quote_post':
+            print("Generating a Motivational Quote Post...")
+            quote_content_hint = random.choice(['startup', 'business', 'financial', 'entrepreneurial', 'technology'])
+            generated_quote_data = generate_motivational_quote_with_ai(
+                content_hint=quote_content_hint,
+                ai_client_instance=text_processor.client,
+                api_key=OPENROUTER_API_KEY,
+                site_url=OPENROUTER_SITE_URL,
+                site_name=OPENROUTER_SITE_NAME,
+                cache_scope=f"post-slot-{job['slot']}"
+            )
+            post_to_process['quote_text'] = generated_quote_data['quote']
+            post_to_process['quote_author'] = generated_quote_data['author']
+            post_to_process['title'] = generated_quote_data['quote']
+            post_to_process['summary'] = generated_quote_data['author']
+            post_to_process['storytelling_method'] = 'Motivational Quote'
+            job['image'] = Image.new('RGB', (CANVAS_WIDTH, IMAGE_DISPLAY_HEIGHT), color=(251, 234, 231))
+            post_to_process['image_source'] = 'generated_background'
+            job['title_ready'].set()
+            return
 
-    if content_type_for_this_run == 'motivational_quote_post':
-        print("Generating a Motivational Quote Post...")
-        quote_content_hint = random.choice(['startup', 'business', 'financial', 'entrepreneurial', 'technology'])
-        generated_quote_data = generate_motivational_quote_with_ai(
-            content_hint=quote_content_hint,
-            ai_client_instance=text_processor.client,
-            api_key=OPENROUTER_API_KEY,
-            site_url=OPENROUTER_SITE_URL,
-            site_name=OPENROUTER_SITE_NAME
-        )
-        post_to_process['quote_text'] = generated_quote_data['quote']
-        post_to_process['quote_author'] = generated_quote_data['author']
-        post_to_process['title'] = generated_quote_data['quote']
-        post_to_process['summary'] = generated_quote_data['author']
-        post_to_process['storytelling_method'] = 'Motivational Quote'
-        final_pil_image = Image.new('RGB', (CANVAS_WIDTH, IMAGE_DISPLAY_HEIGHT), color=(251, 234, 231))
-        post_to_process['image_source'] = 'generated_background'
-
-    else:
         news_item = news_fetcher.get_single_content_item(content_type_for_this_run)
 
         if not news_item:
             print(f"No recent news available for '{content_type_for_this_run.replace('_', ' ').title()}' after all attempts. Skipping post creation.")
-            workflow_manager.increment_post_type_index()
+            job['skipped'] = True
+            job['title_ready'].set()
             return
 
+        # Later posts of the batch are fetched before this one is saved; keep them off this article.
+        news_fetcher.seen_index.reserve(news_item.get('url'), news_item.get('title'))
         post_to_process.update(news_item)
         post_to_process['original_description'] = post_to_process.get('description', 'N/A')
+        post_to_process['original_title'] = post_to_process.get('title', 'N/A')
 
         print(f"Original Title: {post_to_process.get('title', 'N/A')}")
         print(f"Original Description: {post_to_process.get('description', 'N/A')[:100]}...")
 
-        short_title, summary, storytelling_method_used, text_process_success = text_processor.process_text(
-            post_to_process.get('title', ''),
-            post_to_process.get('description', ''),
-            post_to_process.get('type', ''),
-            style_recommendations=recommendation_text_for_llm
-        )
-
-        if not text_process_success:
-            print(f"Deepseek text processing failed for this post. Skipping post creation.")
-            workflow_manager.increment_post_type_index()
+    def text_stage(job):
+        """Rewrites the news article into a headline and summary (and, in bundle mode, the caption)."""
+        if job['skipped'] or job['content_type'] == 'motivational_quote_post':
             return
+        try:
+            write_post_text(job)
+        finally:
+            job['title_ready'].set() # Unblocks the image stage even if the text call failed
+
+    def on_streamed_title(job, short_title):
+        """Lets the image stage start on the headline while the summary is still streaming."""
+        print(f"Headline streamed in early: {short_title}")
+        job['early_title'] = short_title
+        job['title_ready'].set()
+
+    def write_post_text(job):
+        post_to_process = job['post']
+        on_title = (lambda short_title: on_streamed_title(job, short_title)) if LLM_STREAMING_ENABLED else None
+
+        post_bundle = None
+        if LLM_POST_BUNDLE_MODE:
+            print("Generating title, summary, caption and hashtags in a single LLM call...")
+            post_bundle = text_processor.generate_post_bundle(
+                post_to_process.get('title', ''),
+                post_to_process.get('description', ''),
+                post_to_process.get('type', ''),
+                style_recommendations=recommendation_text_for_llm,
+                on_title=on_title
+            )
+            if post_bundle is None:
+                print("Post bundle generation failed. Falling back to separate text and caption calls.")
+
+        if post_bundle:
+            short_title = post_bundle['short_title']
+            summary = post_bundle['summary']
+            storytelling_method_used = post_bundle['storytelling_method']
+        else:
+            short_title, summary, storytelling_method_used, text_process_success = text_processor.process_text(
+                post_to_process.get('title', ''),
+                post_to_process.get('description', ''),
+                post_to_process.get('type', ''),
+                style_recommendations=recommendation_text_for_llm,
+                on_title=on_title
+            )
+
+            if not text_process_success:
+                print(f"Deepseek text processing failed for this post. Skipping post creation.")
+                job['skipped'] = True
+                return
 
         post_to_process['title'] = short_title
         post_to_process['summary'] = summary
         post_to_process['storytelling_method'] = storytelling_method_used
-        post_to_process['seo_caption'] = ""
-        post_to_process['hashtags'] = []
+        post_to_process['seo_caption'] = post_bundle['caption'] if post_bundle else ""
+        post_to_process['hashtags'] = post_bundle['hashtags'] if post_bundle else []
+        job['caption_ready'] = post_bundle is not None
 
         print(f"Generated Short Title (Storytelling: {storytelling_method_used}): {short_title}")
         print(f"Generated Summary: {summary}")
 
+    def image_stage(job):
+        """
+        Generates or fetches the news photo, falling back to a placeholder. Starts once the headline is
+        known: when it was streamed in early the prompt uses the headline alone, otherwise headline and summary.
+        """
+        if job['skipped'] or job['content_type'] == 'motivational_quote_post':
+            return
+        while not job['title_ready'].wait(1.0):
+            if stage_graph.error is not None:
+                return # The text stage for this post will never be started
+        post_to_process = job['post']
+        if job['skipped'] or ('summary' not in post_to_process and not job.get('early_title')):
+            return
+        topic = job['early_title'] if job.get('early_title') else f"{post_to_process['title']}, {post_to_process['summary']}"
+
         # --- MODIFIED: Image Generation/Fetching Logic for News Posts ---
-        image_search_prompt = f"professional photograph of {short_title}, {summary}, {content_type_for_this_run.replace('_', ' ')}, cinematic, high detail"
-        
+        image_search_prompt = f"professional photograph of {topic}, {job['content_type'].replace('_', ' ')}, cinematic, high detail"
+
         # 1. First, try to GENERATE an image from Hugging Face
         print("\nAttempting to generate image using Hugging Face models...")
         final_pil_image = image_generator.generate_image_from_hf(image_search_prompt)
         if final_pil_image:
             post_to_process['image_source'] = 'HuggingFace-Generated'
-        
+
         # 2. If generation fails, FALLBACK to fetching an image from APIs
         if final_pil_image is None:
             print("\nImage generation failed or was skipped. Falling back to fetching image from stock photo APIs...")
@@ -1759,72 +2792,145 @@ def run_workflow():
                                   text_to_draw, font=fallback_font, fill=COLOR_SOURCE_TEXT)
             post_to_process['image_source'] = 'placeholder'
         # --- END MODIFIED LOGIC ---
+        job['image'] = final_pil_image
 
-
-    print("Composing final post image with overlays...")
-    final_post_image = image_local_processor.overlay_text(final_pil_image, {
-        'title': post_to_process.get('title', ''),
-        'summary': post_to_process.get('summary', ''),
-        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        'source': post_to_process.get('source', 'Unknown Source') if 'source' in post_to_process else 'N/A',
-        'content_type_display': post_to_process.get('type')
-    })
-    post_to_process['final_image'] = final_post_image
-
-    print("Generating caption and hashtags with Mistral...")
-    instagram_caption, instagram_hashtags, caption_success = caption_generator.generate_caption_and_hashtags(
-        post_to_process['title'],
-        post_to_process['summary'],
-        post_to_process.get('storytelling_method', 'N/A'),
-        post_to_process['type'],
-        style_recommendations=recommendation_text_for_llm
-    )
-
-    post_to_process['seo_caption'] = instagram_caption
-    post_to_process['hashtags'] = instagram_hashtags
-
-    print(f"Generated Instagram Caption: {instagram_caption[:100]}...")
-    print(f"Generated Hashtags: {', '.join(instagram_hashtags)}")
-
-    print("Saving post metadata and local image...")
-    local_saver.save_post(post_to_process, workflow_manager)
-
-    cloudinary_media_url = None
-    media_to_upload_path = os.path.join(IMAGE_OUTPUT_DIR, f"{post_to_process['Post_ID']}.png")
-    if post_to_process['final_image'] and os.path.exists(media_to_upload_path):
-        print("Uploading image to Cloudinary...")
-        cloudinary_media_url = cloudinary_uploader.upload_image(
-            media_to_upload_path,
-            public_id=post_to_process['Post_ID'],
-            folder="insight_pulse_posts"
+    def compose_stage(job):
+        """Renders the final post image."""
+        if job['skipped']:
+            return
+        post_to_process = job['post']
+
+        print("Composing final post image with overlays...")
+        final_post_image = image_local_processor.overlay_text(job['image'], {
+            'title': post_to_process.get('title', ''),
+            'summary': post_to_process.get('summary', ''),
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'source': post_to_process.get('source', 'Unknown Source') if 'source' in post_to_process else 'N/A',
+            'content_type_display': post_to_process.get('type')
+        })
+        post_to_process['final_image'] = final_post_image
+
+    def caption_stage(job):
+        """Writes the caption and hashtags; only needs the title and summary, so it runs alongside the image work."""
+        if job['skipped'] or job.get('caption_ready'):
+            return
+        post_to_process = job['post']
+
+        print("Generating caption and hashtags with Mistral...")
+        instagram_caption, instagram_hashtags, caption_success = caption_generator.generate_caption_and_hashtags(
+            post_to_process['title'],
+            post_to_process['summary'],
+            post_to_process.get('storytelling_method', 'N/A'),
+            post_to_process['type'],
+            style_recommendations=recommendation_text_for_llm
         )
-        post_to_process['cloudinary_url'] = cloudinary_media_url
-    else:
-        print("Skipping Cloudinary upload: No valid local media found.")
-        post_to_process['cloudinary_url'] = "N/A - Media not uploaded"
 
+        post_to_process['seo_caption'] = instagram_caption
+        post_to_process['hashtags'] = instagram_hashtags
 
-    if cloudinary_media_url:
-        print("Attempting to post to Instagram...")
-        combined_caption = f"{post_to_process['seo_caption']}\n\n{' '.join(post_to_process['hashtags'])}"
-        instagram_post_success = instagram_poster.post_image(cloudinary_media_url, combined_caption)
-        post_to_process['instagram_posted'] = instagram_post_success
-    else:
-        print("Skipping Instagram post: No Cloudinary media URL available.")
-        post_to_process['instagram_posted'] = False
+        print(f"Generated Instagram Caption: {instagram_caption[:100]}...")
+        print(f"Generated Hashtags: {', '.join(instagram_hashtags)}")
 
+    def publish_stage(job):
+        """Saves, uploads and posts the post, then advances the workflow state (also for skipped posts)."""
+        if job['skipped']:
+            workflow_manager.increment_post_type_index()
+            return
+        post_to_process = job['post']
+
+        encoded_image = None
+        if isinstance(post_to_process.get('final_image'), Image.Image):
+            if OUTPUT_ENCODER_COMPARE_FORMATS and job is jobs[0]:
+                local_saver.encoder.compare(post_to_process['final_image'])
+            encoded_image = local_saver.encode_image(post_to_process['final_image'])
+            print(f"Encoded final image as {encoded_image.format}: {len(encoded_image.data) / 1024:.0f} KB in {encoded_image.seconds * 1000:.0f} ms.")
+
+        local_saver.assign_post_id(post_to_process, workflow_manager)
+        if encoded_image is not None:
+            local_saver.start_image_write(post_to_process, encoded_image) # Overlaps the upload
+
+        cloudinary_media_url = None
+        if encoded_image is not None:
+            print("Uploading image to Cloudinary...")
+            cloudinary_media_url = cloudinary_uploader.upload_image(
+                io.BytesIO(encoded_image.data),
+                public_id=post_to_process['Post_ID'],
+                folder="insight_pulse_posts"
+            )
+            post_to_process['cloudinary_url'] = cloudinary_media_url
+        else:
+            print("Skipping Cloudinary upload: No final image was rendered.")
+            post_to_process['cloudinary_url'] = "N/A - Media not uploaded"
 
-    if 'final_image' in post_to_process:
-        del post_to_process['final_image']
 
-    workflow_manager.increment_post_type_index()
-    print(f"Successfully processed post {post_number_for_this_run}/{len(CONTENT_TYPE_CYCLE)}. State updated for next trigger.")
+        if cloudinary_media_url:
+            print("Attempting to post to Instagram...")
+            combined_caption = f"{post_to_process['seo_caption']}\n\n{' '.join(post_to_process['hashtags'])}"
+            instagram_post_success = instagram_poster.post_image(cloudinary_media_url, combined_caption)
+            post_to_process['instagram_posted'] = instagram_post_success
+        else:
+            print("Skipping Instagram post: No Cloudinary media URL available.")
+            post_to_process['instagram_posted'] = False
+
+        # Saved after publishing, so the record holds the Cloudinary URL and whether Instagram took the post
+        print("Saving post metadata and local image...")
+        appended = local_saver.save_post(post_to_process, workflow_manager)
+
+        # Only a published article counts as seen, so one whose upload failed can be posted on a later run
+        news_fetcher.seen_index.record_post(post_to_process.get('url'), post_to_process.get('original_title'),
+                                            published=bool(post_to_process['instagram_posted']), appended=appended)
+        news_fetcher.save_state() # Picks up pool entries from feeds that finished after the first article was chosen
+
+        if 'final_image' in post_to_process:
+            del post_to_process['final_image']
+
+        workflow_manager.increment_post_type_index()
+        print(f"Successfully processed post {job['post_number']}/{len(CONTENT_TYPE_CYCLE)}. State updated for next trigger.")
+
+    jobs = []
+    for offset in range(post_count):
+        content_type_for_post = workflow_manager.get_current_post_type(offset)
+        jobs.append({
+            'content_type': content_type_for_post,
+            'post_number': workflow_manager.get_current_post_number(offset),
+            'slot': workflow_manager.posts_generated_in_cycle + offset, # Stays the same when a failed post is retried
+            'post': {'type': content_type_for_post, 'content_type_display': content_type_for_post},
+            'image': None,
+            'skipped': False,
+            'title_ready': threading.Event(), # Set once the headline is known, or the post is skipped
+        })
+
+    stage_graph = StageGraph([
+        ('article', article_stage, []),
+        ('text', text_stage, ['article']),
+        # Streaming hands the image stage the headline before text finishes (title_ready); otherwise it needs the text
+        ('image', image_stage, ['article'] if LLM_STREAMING_ENABLED else ['article', 'text']),
+        ('caption', caption_stage, ['text']),
+        ('compose', compose_stage, ['image', 'text']),
+        ('publish', publish_stage, ['compose', 'caption']),
+    ])
+    stage_graph.run(jobs)
+    local_saver.flush()
+    stage_graph.report()
+    local_saver.encoder.report_stats()
+    if stage_graph.error is not None:
+        raise stage_graph.error
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate and publish Insight Pulse posts.")
+    parser.add_argument('--posts', type=int, default=1,
+                        help="Number of posts to produce in this invocation, following CONTENT_TYPE_CYCLE.")
+    args = parser.parse_args()
+
     check_api_keys()
+    font_registry.preload()
     try:
-        run_workflow()
+        run_workflow(post_count=max(1, args.posts))
+        font_registry.report_stats()
+        llm_response_cache.report_stats()
+        http_sessions.report_stats()
+        image_asset_cache.report_stats()
     except Exception as e:
         print(f"\nCritical error during workflow execution: {e}")
         import traceback
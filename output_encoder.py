@@ -0,0 +1,86 @@
+# output_encoder.py
+import io
+import threading
+import time
+from collections import namedtuple
+from PIL import Image
+from config import (
+    OUTPUT_IMAGE_FORMAT, OUTPUT_FLATTEN_ALPHA, OUTPUT_FLATTEN_BACKGROUND,
+    OUTPUT_JPEG_QUALITY, OUTPUT_JPEG_PROGRESSIVE, OUTPUT_JPEG_OPTIMIZE, OUTPUT_JPEG_SUBSAMPLING,
+    OUTPUT_WEBP_QUALITY, OUTPUT_WEBP_METHOD, OUTPUT_WEBP_LOSSLESS,
+    OUTPUT_PNG_COMPRESS_LEVEL, OUTPUT_PNG_OPTIMIZE
+)
+
+EncodedImage = namedtuple('EncodedImage', ['data', 'format', 'extension', 'seconds'])
+
+class OutputEncoder:
+    """
+    Encodes final post images with the format and settings from config.py (progressive JPEG,
+    WebP or tuned PNG), flattening transparency onto a solid background where the format or
+    OUTPUT_FLATTEN_ALPHA calls for it. Keeps per-format encode time and size so the formats
+    can be compared.
+    """
+
+    EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp', 'PNG': 'png'}
+
+    def __init__(self, output_format=OUTPUT_IMAGE_FORMAT):
+        self.output_format = output_format.upper()
+        if self.output_format not in self.EXTENSIONS:
+            print(f"Unknown OUTPUT_IMAGE_FORMAT '{output_format}'. Falling back to PNG.")
+            self.output_format = 'PNG'
+        self.stats = {} # format -> [images, bytes, seconds]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _flatten(image):
+        """Composites an image with transparency onto OUTPUT_FLATTEN_BACKGROUND and returns it as RGB."""
+        if image.mode == 'RGB':
+            return image
+        if image.mode == 'P' and 'transparency' in image.info:
+            image = image.convert('RGBA')
+        if image.mode in ('RGBA', 'LA'):
+            background = Image.new('RGB', image.size, OUTPUT_FLATTEN_BACKGROUND)
+            background.paste(image, mask=image.getchannel('A'))
+            return background
+        return image.convert('RGB')
+
+    @staticmethod
+    def _save_options(output_format):
+        if output_format == 'JPEG':
+            return {'quality': OUTPUT_JPEG_QUALITY, 'progressive': OUTPUT_JPEG_PROGRESSIVE,
+                    'optimize': OUTPUT_JPEG_OPTIMIZE, 'subsampling': OUTPUT_JPEG_SUBSAMPLING}
+        if output_format == 'WEBP':
+            return {'quality': OUTPUT_WEBP_QUALITY, 'method': OUTPUT_WEBP_METHOD, 'lossless': OUTPUT_WEBP_LOSSLESS}
+        return {'compress_level': OUTPUT_PNG_COMPRESS_LEVEL, 'optimize': OUTPUT_PNG_OPTIMIZE}
+
+    def encode(self, image, output_format=None):
+        """Encodes image in output_format (default: the configured one) and returns an EncodedImage."""
+        output_format = output_format or self.output_format
+        start = time.perf_counter()
+        if output_format == 'JPEG' or OUTPUT_FLATTEN_ALPHA:
+            image = self._flatten(image)
+        buffer = io.BytesIO()
+        image.save(buffer, format=output_format, **self._save_options(output_format))
+        data = buffer.getvalue()
+        seconds = time.perf_counter() - start
+        with self._lock:
+            stats = self.stats.setdefault(output_format, [0, 0, 0.0])
+            stats[0] += 1
+            stats[1] += len(data)
+            stats[2] += seconds
+        return EncodedImage(data, output_format, self.EXTENSIONS[output_format], seconds)
+
+    def compare(self, image):
+        """Encodes image in every supported format and prints time and size for each."""
+        print("Output format comparison for this post:")
+        for output_format in self.EXTENSIONS:
+            encoded = self.encode(image, output_format)
+            print(f"  {output_format:<5} {encoded.seconds * 1000:7.0f} ms  {len(encoded.data) / 1024:8.0f} KB")
+
+    def report_stats(self):
+        """Prints average encode time and size per format for this process."""
+        with self._lock:
+            stats = {output_format: list(values) for output_format, values in self.stats.items()}
+        for output_format, (images, total_bytes, seconds) in stats.items():
+            print(f"Output encoding {output_format}: {images} images, "
+                  f"avg {seconds / images * 1000:.0f} ms, avg {total_bytes / images / 1024:.0f} KB.")
@@ -0,0 +1,20 @@
+# racing.py
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+@contextmanager
+def racing_executor(max_workers):
+    """
+    Thread pool for requests raced against each other or against a deadline, where the caller
+    takes the first usable result and moves on. On leaving the block, queued tasks are cancelled
+    and running ones are abandoned rather than awaited.
+
+    Abandoned requests are not cancelled: a running request cannot be interrupted and ends within
+    its own timeout. The concurrent.futures exit hook still joins those threads, so the process
+    exits only after they have finished.
+    """
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        yield executor
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
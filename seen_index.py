@@ -0,0 +1,159 @@
+# seen_index.py
+import hashlib
+import json
+import os
+import re
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from config import SEEN_ARTICLES_FILE, ALL_POSTS_JSON_FILE
+from atomic_file import write_snapshot
+
+class SeenArticleIndex:
+    """
+    Compact persistent index of articles that have already been posted, stored as short
+    hashes of the normalized article URL and original title. Lookups are set-membership
+    checks, so feeds can skip stale stories before any LLM or image call is made.
+    """
+
+    TRACKING_PARAM_PREFIXES = ('utm_', 'fbclid', 'gclid', 'mc_', 'cmpid', 'ref', 'src')
+
+    def __init__(self, index_file=SEEN_ARTICLES_FILE, all_posts_file=ALL_POSTS_JSON_FILE):
+        self.index_file = index_file
+        self.all_posts_file = all_posts_file
+        self.url_hashes = set()
+        self.title_hashes = set()
+        self.indexed_posts = 0 # Number of all_posts.json records folded into the index
+        self.reserved_hashes = set() # Articles picked by an in-flight post; kept in memory only
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    @classmethod
+    def normalize_url(cls, url):
+        """Lowercases scheme and host, drops 'www.', fragments, tracking parameters and trailing slashes."""
+        if not url:
+            return ''
+        parts = urlsplit(url.strip())
+        host = parts.netloc.lower()
+        if host.startswith('www.'):
+            host = host[4:]
+        query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                 if not key.lower().startswith(cls.TRACKING_PARAM_PREFIXES)]
+        path = parts.path.rstrip('/')
+        return urlunsplit(('', host, path, urlencode(sorted(query)), ''))
+
+    @staticmethod
+    def normalize_title(title):
+        """Lowercases the title and keeps only letters, digits and single spaces."""
+        if not title:
+            return ''
+        return re.sub(r'\s+', ' ', re.sub(r'[^\w\s]', '', title.lower())).strip()
+
+    @staticmethod
+    def _hash(text):
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+    def _load(self):
+        """Loads the index, then folds in any all_posts.json records it has not seen yet."""
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.url_hashes = set(data.get('url_hashes', []))
+                self.title_hashes = set(data.get('title_hashes', []))
+                self.indexed_posts = data.get('indexed_posts', 0)
+            except json.JSONDecodeError:
+                print(f"Seen-article index {self.index_file} is corrupted. Rebuilding from {self.all_posts_file}.")
+                self.indexed_posts = 0
+            except Exception as e:
+                print(f"Error loading seen-article index {self.index_file}: {e}. Rebuilding from {self.all_posts_file}.")
+                self.indexed_posts = 0
+
+        self._fold_in_all_posts()
+        print(f"Seen-article index loaded: {len(self.url_hashes)} URLs, {len(self.title_hashes)} titles.")
+
+    def _fold_in_all_posts(self):
+        if not os.path.exists(self.all_posts_file):
+            return
+        try:
+            with open(self.all_posts_file, 'r', encoding='utf-8') as f:
+                posts = json.load(f)
+        except Exception as e:
+            print(f"Could not read {self.all_posts_file} for the seen-article index: {e}")
+            return
+        if not isinstance(posts, list) or len(posts) <= self.indexed_posts:
+            return
+
+        for post in posts[self.indexed_posts:]:
+            # Like record_post(): an article whose upload failed may be picked again
+            if isinstance(post, dict) and post.get('Source_Type') != 'motivational_quote_post' and post.get('Instagram_Posted'):
+                self.add(post.get('Source_URL'), post.get('Original_Title'))
+        self.indexed_posts = len(posts)
+        self._dirty = True
+        self.save()
+
+    def is_seen(self, url, title=None):
+        """Returns True if the article's URL or original title has already been posted or is reserved."""
+        normalized_url = self.normalize_url(url)
+        if normalized_url:
+            url_hash = self._hash(normalized_url)
+            if url_hash in self.url_hashes or url_hash in self.reserved_hashes:
+                return True
+        normalized_title = self.normalize_title(title)
+        if not normalized_title:
+            return False
+        title_hash = self._hash(normalized_title)
+        return title_hash in self.title_hashes or title_hash in self.reserved_hashes
+
+    def reserve(self, url, title=None):
+        """Treats an article as seen for the rest of this process without persisting it."""
+        normalized_url = self.normalize_url(url)
+        normalized_title = self.normalize_title(title)
+        with self._lock:
+            if normalized_url:
+                self.reserved_hashes.add(self._hash(normalized_url))
+            if normalized_title:
+                self.reserved_hashes.add(self._hash(normalized_title))
+
+    def add(self, url, title=None):
+        """Marks an article as posted."""
+        normalized_url = self.normalize_url(url)
+        normalized_title = self.normalize_title(title)
+        with self._lock:
+            if normalized_url:
+                self.url_hashes.add(self._hash(normalized_url))
+            if normalized_title:
+                self.title_hashes.add(self._hash(normalized_title))
+            self._dirty = True
+
+    def record_post(self, url, title=None, published=True, appended=True):
+        """
+        Accounts for a post once it is done and saves the index. The article is only marked as posted
+        if it was published, so one whose upload failed can be picked again; appended says whether
+        its record made it into all_posts.json, the only case in which it counts as folded in.
+        """
+        if published:
+            self.add(url, title)
+        if appended:
+            with self._lock:
+                self.indexed_posts += 1
+                self._dirty = True
+        self.save()
+
+    def _snapshot(self):
+        with self._lock:
+            if not self._dirty:
+                return None
+            self._dirty = False
+            return json.dumps({
+                'indexed_posts': self.indexed_posts,
+                'url_hashes': sorted(self.url_hashes),
+                'title_hashes': sorted(self.title_hashes),
+            })
+
+    def save(self):
+        """Writes the index to disk if it changed."""
+        try:
+            write_snapshot(self.index_file, self._snapshot)
+        except Exception as e:
+            print(f"Error saving seen-article index {self.index_file}: {e}")
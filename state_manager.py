@@ -76,13 +76,13 @@ class WorkflowStateManager:
             json.dump(state, f, indent=4)
         print(f"State saved: current_post_type_index={self.current_post_type_index}, posts_generated_in_cycle={self.posts_generated_in_cycle}, last_analysis_timestamp={self.last_analysis_timestamp}, last_instagram_analysis_timestamp={self.last_instagram_analysis_timestamp}, last_external_instagram_analysis_timestamp={self.last_external_instagram_analysis_timestamp}")
 
-    def get_current_post_type(self):
-        """Returns the content type for the current post in the cycle."""
-        return CONTENT_TYPE_CYCLE[self.current_post_type_index % len(CONTENT_TYPE_CYCLE)]
+    def get_current_post_type(self, offset=0):
+        """Returns the content type for the current post in the cycle, or for the post `offset` places after it."""
+        return CONTENT_TYPE_CYCLE[(self.current_post_type_index + offset) % len(CONTENT_TYPE_CYCLE)]
 
-    def get_current_post_number(self):
-        """Returns the sequential post number within the current cycle."""
-        return (self.posts_generated_in_cycle % len(CONTENT_TYPE_CYCLE)) + 1
+    def get_current_post_number(self, offset=0):
+        """Returns the sequential post number within the current cycle, or for the post `offset` places after it."""
+        return ((self.posts_generated_in_cycle + offset) % len(CONTENT_TYPE_CYCLE)) + 1
 
     def increment_post_type_index(self):
         """Increments the index for the content type cycle and updates generated posts count."""